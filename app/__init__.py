@@ -1,26 +1,47 @@
 """Flask application factory."""
 
-import shlex
-import subprocess
+import os
+import secrets
 from datetime import date, datetime, timedelta
-from zoneinfo import ZoneInfo
 
 import click
-from flask import Flask
-from markupsafe import Markup
-
-from app.config import config
-from app.extensions import db, login_manager, migrate
-
-CEST_TZ = ZoneInfo("Europe/Rome")
+from flask import Flask, current_app
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy.orm import make_transient_to_detached
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app.auth import bp as auth_bp
+from app.auth.cache import UserCache
+from app.auth.models import User, password_hasher
+from app.codes import bp as codes_bp
+from app.codes.models import DiscountCode
+from app.config import config_items
+from app.extensions import db, limiter, login_manager, migrate
+from app.filters import cest_filter, expiry_proximity_filter
+from app.middleware import RobotsHeaderMiddleware
+from app.shares import bp as shares_bp
+from app.shares.visits import VisitBuffer
 
 
 @login_manager.user_loader
-def load_user(user_id: str):
-    """Load user by ID for Flask-Login."""
-    from app.auth.models import User
+def load_user(user_id: str) -> User | None:
+    """Load user by ID for Flask-Login.
 
-    return db.session.get(User, int(user_id))
+    Column values are served from the app's UserCache when fresh; the returned
+    User is detached, so only its column attributes are available.
+    """
+    uid = int(user_id)
+    cache = current_app.extensions["user_cache"]
+    values = cache.get(uid)
+    if values is None:
+        row = db.session.execute(db.select(*User.__table__.columns).where(User.id == uid)).first()
+        if row is None:
+            return None
+        values = row._asdict()
+        cache.set(uid, values)
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
 
 
 def create_app(config_name: str = "default") -> Flask:
@@ -33,60 +54,43 @@ def create_app(config_name: str = "default") -> Flask:
         Configured Flask application instance.
     """
     app = Flask(__name__)
-    app.config.from_object(config[config_name])
+    app.config.update(config_items(config_name))
+
+    cache_dir = app.config["JINJA_BYTECODE_CACHE_DIR"]
+    if cache_dir:
+        # Must be set before app.jinja_env is first touched; it is created from these options.
+        # Template auto-reload already follows app.debug unless TEMPLATES_AUTO_RELOAD is set.
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(cache_dir)}
 
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
-
-    from app.auth import bp as auth_bp
-    from app.codes import bp as codes_bp
-    from app.shares import bp as shares_bp
+    limiter.init_app(app)
+    app.extensions["user_cache"] = UserCache(app.config["USER_CACHE_TTL"])
+    # Logins with unknown usernames verify against this, hashed now so each costs one check
+    app.extensions["dummy_password_hash"] = password_hasher.hash(secrets.token_urlsafe())
+    app.extensions["share_visits"] = VisitBuffer(
+        app.config["SHARE_VISIT_FLUSH_EVERY"], app.config["SHARE_VISIT_FLUSH_SECONDS"]
+    )
 
     app.register_blueprint(codes_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(shares_bp)
 
+    # Take the client IP from the proxy's X-Forwarded-For so rate limits are per visitor
+    if app.config["TRUSTED_PROXY_HOPS"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXY_HOPS"])
+
     # Add X-Robots-Tag header to all responses
-    @app.after_request
-    def add_noindex_header(response):
-        response.headers['X-Robots-Tag'] = 'noindex, nofollow'
-        return response
+    app.wsgi_app = RobotsHeaderMiddleware(app.wsgi_app)
 
     @app.route('/robots.txt')
     def robots_txt():
         return app.send_static_file('robots.txt')
 
-    @app.template_filter("cest")
-    def cest_filter(dt: datetime, fmt: str = "%b %d, %Y %H:%M") -> str:
-        """Convert a UTC datetime to CEST timezone and format it."""
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=ZoneInfo("UTC"))
-        return dt.astimezone(CEST_TZ).strftime(fmt)
-
-    @app.template_filter("expiry_proximity")
-    def expiry_proximity_filter(expiry_date: date | None) -> Markup:
-        """Return an HTML snippet showing how close the expiry date is.
-
-        Returns bold text for ≤7 days, normal text for 8-30 days,
-        or empty string if >30 days or no expiry date.
-        """
-        if expiry_date is None:
-            return Markup("")
-        days_left = (expiry_date - date.today()).days
-        if days_left < 0:
-            return Markup("")
-        if days_left == 0:
-            label = "(today)"
-        elif days_left == 1:
-            label = "(in 1 day)"
-        else:
-            label = f"(in {days_left} days)"
-        if days_left <= 7:
-            return Markup(f' <strong>{label}</strong>')
-        if days_left <= 30:
-            return Markup(f" {label}")
-        return Markup("")
+    app.add_template_filter(cest_filter, "cest")
+    app.add_template_filter(expiry_proximity_filter, "expiry_proximity")
 
     register_cli_commands(app)
 
@@ -95,15 +99,13 @@ def create_app(config_name: str = "default") -> Flask:
 
 def register_cli_commands(app: Flask) -> None:
     """Register CLI commands."""
-    from app.auth.models import User
-    from app.codes.models import DiscountCode
 
     @app.cli.command("create-user")
     @click.argument("username")
     @click.option("--password", prompt=True, hide_input=True, confirmation_prompt=True)
     def create_user(username: str, password: str) -> None:
         """Create a new user."""
-        if User.query.filter_by(username=username).first():
+        if db.session.scalar(db.select(User.id).where(User.username == username)) is not None:
             click.echo(f"Error: User '{username}' already exists.")
             return
 
@@ -119,17 +121,22 @@ def register_cli_commands(app: Flask) -> None:
 
         Sends reminders at multiple thresholds (default: 7 days and 3 days).
         Each code only receives a reminder for the closest matching threshold.
+        All reminders are sent together in a single notification, one per line.
         """
+        # Only needed by this command, so keep them off the web import path
+        import shlex
+        import subprocess
+
         cmd = app.config.get("SLACK_NOTIFIER_CMD")
         if not cmd:
             click.echo(f"[{datetime.now().isoformat()}] Error: SLACK_NOTIFIER_CMD is not configured.")
             raise SystemExit(1)
 
         # Get thresholds from config (sorted descending, e.g., [7, 3])
-        reminder_days_list = app.config.get("REMINDER_DAYS_LIST", [7, 3])
+        reminder_days_list = app.config.get("REMINDER_DAYS_LIST", (7, 3))
         today = date.today()
 
-        sent_count = 0
+        messages = []
         for days_before in reminder_days_list:
             threshold_date = today + timedelta(days=days_before)
 
@@ -144,18 +151,20 @@ def register_cli_commands(app: Flask) -> None:
                 # Use urgent emoji for 3 days or less
                 emoji = ":rotating_light:" if days_before <= 3 else ":warning:"
                 urgency = "URGENT: " if days_before <= 3 else ""
-                message = (
+                messages.append(
                     f"{emoji} {urgency}Reminder: *{code.store_name}* discount code "
                     f"*({code.discount_value})* expires on _{code.expiry_date}_!"
                 )
-                try:
-                    subprocess.run([*shlex.split(cmd), message], check=True)
-                    sent_count += 1
-                except subprocess.CalledProcessError as e:
-                    click.echo(f"[{datetime.now().isoformat()}] Error: Failed to send notification: {e}")
-                    raise SystemExit(1)
-
-        click.echo(f"[{datetime.now().isoformat()}] Sent {sent_count} expiry reminder(s).")
+
+        # Send all reminders as one multi-line notification: one process per run, not per code
+        if messages:
+            try:
+                subprocess.run([*shlex.split(cmd), "\n".join(messages)], check=True)
+            except subprocess.CalledProcessError as e:
+                click.echo(f"[{datetime.now().isoformat()}] Error: Failed to send notification: {e}")
+                raise SystemExit(1)
+
+        click.echo(f"[{datetime.now().isoformat()}] Sent {len(messages)} expiry reminder(s).")
 
 
 def init_db(app: Flask) -> None:
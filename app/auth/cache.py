@@ -0,0 +1,59 @@
+"""In-process cache for users loaded on every authenticated request."""
+
+import threading
+import time
+from typing import Any
+
+
+class UserCache:
+    """Thread-safe TTL cache of user column values keyed by user id.
+
+    Flask-Login reloads the user on every request and each request gets a new
+    session, so the identity map never helps. Entries expire after ``ttl``
+    seconds, which also bounds staleness for changes made by other processes
+    (e.g. the CLI). When full, the oldest entry is evicted.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024) -> None:
+        """Create an empty cache.
+
+        Args:
+            ttl: Seconds an entry stays valid. Zero or less disables caching.
+            maxsize: Maximum number of cached users.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: dict[int, tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> dict[str, Any] | None:
+        """Return the cached column values for a user, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return values
+
+    def set(self, user_id: int, values: dict[str, Any]) -> None:
+        """Cache the column values for a user."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if len(self._entries) >= self.maxsize:
+                del self._entries[next(iter(self._entries))]
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user from the cache."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop every cached user."""
+        with self._lock:
+            self._entries.clear()
@@ -1,16 +1,18 @@
 """Auth domain models."""
 
-from datetime import datetime, timezone
+from datetime import datetime
 
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from flask import current_app, has_app_context
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import check_password_hash
 
 from app.extensions import db
+from app.timeutils import UTCDateTime, utcnow
 
-
-def utcnow() -> datetime:
-    """Return current UTC datetime."""
-    return datetime.now(timezone.utc)
+# OWASP-recommended argon2id parameters
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
 
 
 class User(UserMixin, db.Model):
@@ -21,15 +23,32 @@ class User(UserMixin, db.Model):
     id: int = db.Column(db.Integer, primary_key=True)
     username: str = db.Column(db.String(80), unique=True, nullable=False)
     password_hash: str = db.Column(db.String(256), nullable=False)
-    created_at: datetime = db.Column(db.DateTime(timezone=True), default=utcnow)
+    created_at: datetime = db.Column(UTCDateTime, default=utcnow)
 
     def set_password(self, password: str) -> None:
         """Hash and set the user's password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
+        # Don't keep serving the old hash from the login cache
+        if self.id is not None and has_app_context():
+            current_app.extensions["user_cache"].invalidate(self.id)
 
     def check_password(self, password: str) -> bool:
-        """Check if the provided password matches the hash."""
-        return check_password_hash(self.password_hash, password)
+        """Check if the provided password matches the hash.
+
+        Hashes created by Werkzeug before the switch to argon2 are still accepted.
+        """
+        if not self.password_hash.startswith("$argon2"):
+            return check_password_hash(self.password_hash, password)
+        try:
+            return password_hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def password_needs_rehash(self) -> bool:
+        """Check if the stored hash is legacy or uses outdated argon2 parameters."""
+        if not self.password_hash.startswith("$argon2"):
+            return True
+        return password_hasher.check_needs_rehash(self.password_hash)
 
     def __repr__(self) -> str:
         """Return string representation of the model."""
@@ -1,9 +1,18 @@
 """Auth domain routes."""
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import (
+    Blueprint,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask_login import login_required, login_user, logout_user
 
 from app.auth.models import User
+from app.extensions import db
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
@@ -19,8 +28,16 @@ def login():
             flash("Username and password are required.", "error")
             return render_template("auth/login.html")
 
-        user = User.query.filter_by(username=username).first()
-        if user and user.check_password(password):
+        user = db.session.scalar(db.select(User).where(User.username == username))
+        if user is None:
+            # Same hashing work as a real check, so timing doesn't reveal unknown usernames
+            dummy = User(password_hash=current_app.extensions["dummy_password_hash"])
+            dummy.check_password(password)
+        elif user.check_password(password):
+            # Upgrade legacy hashes now that the plaintext password is known
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
             login_user(user)
             next_page = request.args.get("next")
             return redirect(next_page or url_for("codes.index"))
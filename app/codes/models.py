@@ -1,21 +1,19 @@
 """Codes domain models."""
 
-from datetime import date, datetime, timezone
+from datetime import date, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy.orm import Mapped
+from sqlalchemy import ColumnElement
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, validates
 
 from app.extensions import db
+from app.timeutils import UTCDateTime, utcnow
 
 if TYPE_CHECKING:
     from app.auth.models import User
 
 
-def utcnow() -> datetime:
-    """Return current UTC datetime."""
-    return datetime.now(timezone.utc)
-
-
 class DiscountCode(db.Model):
     """Model for discount codes."""
 
@@ -28,20 +26,45 @@ class DiscountCode(db.Model):
     expiry_date: date | None = db.Column(db.Date)
     notes: str | None = db.Column(db.Text)
     store_url: str | None = db.Column(db.String(500))
+    # Lowercased copies for case-insensitive search, kept in sync by _set_lower
+    store_name_lower: str = db.Column(db.String(200), nullable=False)
+    store_url_lower: str | None = db.Column(db.String(500))
     is_used: bool = db.Column(db.Boolean, default=False)
-    created_at: datetime = db.Column(db.DateTime(timezone=True), default=utcnow)
-    user_id: int = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    created_at: datetime = db.Column(UTCDateTime, default=utcnow)
+    user_id: int = db.Column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False, index=True
+    )
 
     user: Mapped["User"] = db.relationship("User", backref="discount_codes")
 
-    @property
+    __table_args__ = (
+        # Reminder lookups filter on is_used + expiry_date; the homepage sorts by expiry_date
+        db.Index("ix_codes_used_expiry", "is_used", "expiry_date"),
+        # The homepage's expiry filters and sort, optionally narrowed by user_id
+        db.Index("ix_codes_expiry_user", "expiry_date", "user_id"),
+    )
+
+    @validates("store_name", "store_url")
+    def _set_lower(self, key: str, value: str | None) -> str | None:
+        """Mirror store_name and store_url into their lowercased columns."""
+        setattr(self, f"{key}_lower", value.lower() if value is not None else None)
+        return value
+
+    @hybrid_property
     def is_expired(self) -> bool:
         """Check if the discount code has expired."""
         if self.expiry_date is None:
             return False
         return self.expiry_date < date.today()
 
-    @property
+    @is_expired.inplace.expression
+    @classmethod
+    def _is_expired_expression(cls) -> ColumnElement[bool]:
+        """SQL form of is_expired, usable in WHERE clauses."""
+        # Explicit NULL check so NOT is_expired stays true for codes without expiry
+        return db.and_(cls.expiry_date.is_not(None), cls.expiry_date < date.today())
+
+    @hybrid_property
     def is_shareable(self) -> bool:
         """Check if the discount code can be shared.
 
@@ -49,6 +72,12 @@ class DiscountCode(db.Model):
         """
         return not self.is_used and not self.is_expired
 
+    @is_shareable.inplace.expression
+    @classmethod
+    def _is_shareable_expression(cls) -> ColumnElement[bool]:
+        """SQL form of is_shareable, usable in WHERE clauses."""
+        return db.and_(cls.is_used.is_not(True), db.not_(cls.is_expired))
+
     def __repr__(self) -> str:
         """Return string representation of the model."""
         return f"<DiscountCode {self.code} for {self.store_name}>"
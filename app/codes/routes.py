@@ -1,9 +1,13 @@
 """Codes domain routes."""
 
-from datetime import date, datetime
+import math
+from datetime import date
+from functools import lru_cache
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
+from sqlalchemy import Select, update
+from sqlalchemy.orm import joinedload
 from werkzeug.wrappers import Response
 
 from app.auth.models import User
@@ -12,6 +16,56 @@ from app.extensions import db
 
 bp = Blueprint("codes", __name__)
 
+CODES_PER_PAGE = 50
+
+
+@lru_cache(maxsize=None)
+def _codes_statement(expiration: str, has_search: bool, has_user: bool) -> Select:
+    """Build the homepage listing statement for one combination of filters.
+
+    Filter values are bind parameters, so each of the few possible shapes is
+    built once and reused; callers supply values with ``.params()``.
+
+    Args:
+        expiration: 'all', 'active', or 'expired'.
+        has_search: Whether to filter by the search_pattern parameter.
+        has_user: Whether to filter by the user_id parameter.
+
+    Returns:
+        Select statement for DiscountCode rows sorted by expiry date.
+    """
+    # Each card shows "edited by <username>"; a many-to-one join loads it with the page
+    stmt = db.select(DiscountCode).options(joinedload(DiscountCode.user))
+
+    # Apply text search filter
+    if has_search:
+        search_pattern = db.bindparam("search_pattern")
+        stmt = stmt.where(
+            db.or_(
+                DiscountCode.store_name_lower.like(search_pattern),
+                DiscountCode.store_url_lower.like(search_pattern),
+            )
+        )
+
+    # Apply expiration filter
+    today = db.bindparam("today", type_=db.Date)
+    if expiration == "active":
+        stmt = stmt.where(
+            db.or_(
+                DiscountCode.expiry_date.is_(None),
+                DiscountCode.expiry_date >= today,
+            )
+        )
+    elif expiration == "expired":
+        stmt = stmt.where(DiscountCode.expiry_date < today)
+
+    # Apply user filter
+    if has_user:
+        stmt = stmt.where(DiscountCode.user_id == db.bindparam("user_id"))
+
+    # id breaks expiry ties so rows don't shift between pages
+    return stmt.order_by(DiscountCode.expiry_date.asc().nullslast(), DiscountCode.id)
+
 
 @bp.route("/")
 @login_required
@@ -23,6 +77,9 @@ def index() -> str:
     - expiration: 'all', 'active', or 'expired'
     - user_id: filter by user who created the code
 
+    Results are paginated via the page query parameter; pages past the end
+    show the last page.
+
     Returns:
         Rendered homepage template with filtered codes sorted by expiry date.
     """
@@ -31,43 +88,45 @@ def index() -> str:
     user_id_str = request.args.get("user_id", "").strip()
     today = date.today()
 
-    query = DiscountCode.query
-
-    # Apply text search filter
+    params: dict[str, object] = {"today": today}
     if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            db.or_(
-                DiscountCode.store_name.ilike(search_pattern),
-                DiscountCode.store_url.ilike(search_pattern),
-            )
-        )
-
-    # Apply expiration filter
-    if expiration == "active":
-        query = query.filter(
-            db.or_(
-                DiscountCode.expiry_date.is_(None),
-                DiscountCode.expiry_date >= today,
-            )
-        )
-    elif expiration == "expired":
-        query = query.filter(DiscountCode.expiry_date < today)
+        params["search_pattern"] = f"%{search.lower()}%"
 
     # Apply user filter
     if user_id_str:
         try:
-            user_id = int(user_id_str)
-            query = query.filter(DiscountCode.user_id == user_id)
+            params["user_id"] = int(user_id_str)
         except ValueError:
             pass  # Invalid user_id, ignore filter
 
-    codes = query.order_by(DiscountCode.expiry_date.asc().nullslast()).all()
-    users = User.query.order_by(User.username).all()
+    stmt = _codes_statement(
+        expiration if expiration in ("active", "expired") else "all",
+        "search_pattern" in params,
+        "user_id" in params,
+    )
+    listing = stmt.params(params)
+    # Count once up front so a page past the end can be clamped to the last page
+    total = db.session.scalar(
+        db.select(db.func.count()).select_from(listing.order_by(None).subquery())
+    )
+    last_page = max(math.ceil(total / CODES_PER_PAGE), 1)
+    pagination = db.paginate(
+        listing,
+        page=min(request.args.get("page", 1, type=int), last_page),
+        per_page=CODES_PER_PAGE,
+        error_out=False,
+        count=False,
+    )
+    pagination.total = total
+    # The filter dropdown only needs id and username, so skip hydrating User rows
+    users = db.session.execute(
+        db.select(User.id, User.username).order_by(User.username)
+    ).all()
 
     return render_template(
         "codes/index.html",
-        codes=codes,
+        codes=pagination.items,
+        pagination=pagination,
         today=today,
         search=search,
         expiration=expiration,
@@ -76,6 +135,25 @@ def index() -> str:
     )
 
 
+def _form_error(message: str, form_url: str) -> str | Response:
+    """Report a validation error for the add/edit code forms.
+
+    HTMX submits only need the error fragment for the form's result area;
+    regular submits are redirected back to the form with a flash message.
+
+    Args:
+        message: The error message to show.
+        form_url: URL of the form to return to for non-HTMX requests.
+
+    Returns:
+        Rendered error partial or redirect to the form.
+    """
+    if request.headers.get("HX-Request"):
+        return render_template("codes/partials/form_error.html", message=message)
+    flash(message, "error")
+    return redirect(form_url)
+
+
 @bp.route("/codes/add", methods=["GET", "POST"])
 @login_required
 def add_code() -> str | Response:
@@ -93,16 +171,14 @@ def add_code() -> str | Response:
         store_url = request.form.get("store_url", "").strip() or None
 
         if not code or not store_name:
-            flash("Code and store name are required.", "error")
-            return render_template("codes/add.html")
+            return _form_error("Code and store name are required.", url_for("codes.add_code"))
 
         expiry_date = None
         if expiry_date_str:
             try:
-                expiry_date = datetime.strptime(expiry_date_str, "%Y-%m-%d").date()
+                expiry_date = date.fromisoformat(expiry_date_str)
             except ValueError:
-                flash("Invalid date format.", "error")
-                return render_template("codes/add.html")
+                return _form_error("Invalid date format.", url_for("codes.add_code"))
 
         discount_code = DiscountCode(
             code=code,
@@ -149,16 +225,19 @@ def edit_code(code_id: int) -> str | Response:
         is_used = request.form.get("is_used") == "1"
 
         if not code or not store_name:
-            flash("Code and store name are required.", "error")
-            return render_template("codes/edit.html", code=discount_code)
+            return _form_error(
+                "Code and store name are required.",
+                url_for("codes.edit_code", code_id=code_id),
+            )
 
         expiry_date = None
         if expiry_date_str:
             try:
-                expiry_date = datetime.strptime(expiry_date_str, "%Y-%m-%d").date()
+                expiry_date = date.fromisoformat(expiry_date_str)
             except ValueError:
-                flash("Invalid date format.", "error")
-                return render_template("codes/edit.html", code=discount_code)
+                return _form_error(
+                    "Invalid date format.", url_for("codes.edit_code", code_id=code_id)
+                )
 
         discount_code.code = code
         discount_code.store_name = store_name
@@ -210,8 +289,12 @@ def mark_used(code_id: int) -> Response:
     Returns:
         Redirect to homepage on success.
     """
-    discount_code = db.get_or_404(DiscountCode, code_id)
-    discount_code.is_used = True
+    # A single UPDATE: the row is never loaded, and a missing code matches nothing
+    result = db.session.execute(
+        update(DiscountCode).where(DiscountCode.id == code_id).values(is_used=True)
+    )
+    if result.rowcount == 0:
+        abort(404)
     db.session.commit()
 
     flash("Discount code marked as used!", "success")
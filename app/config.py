@@ -1,13 +1,18 @@
 """Application configuration classes."""
 
 import os
-from typing import ClassVar
+from functools import cache
+from typing import Any, ClassVar
 
 
-def _parse_reminder_days(env_value: str | None, default: str) -> list[int]:
+# Read once and shared by the configs that talk to a real database
+_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///discount_codes.db")
+
+
+def _parse_reminder_days(env_value: str | None, default: str) -> tuple[int, ...]:
     """Parse comma-separated reminder days from environment variable."""
     value = env_value or default
-    return sorted([int(d.strip()) for d in value.split(",")], reverse=True)
+    return tuple(sorted((int(d.strip()) for d in value.split(",")), reverse=True))
 
 
 class Config:
@@ -15,9 +20,24 @@ class Config:
 
     SECRET_KEY: str = os.environ.get("SECRET_KEY", "dev-secret-key")
     SQLALCHEMY_TRACK_MODIFICATIONS: ClassVar[bool] = False
+    # Statement logging stays off unless a config explicitly opts in
+    SQLALCHEMY_ECHO: ClassVar[bool] = False
+    # Seconds Flask-Login's user lookups are cached per process (0 disables)
+    USER_CACHE_TTL: int = int(os.environ.get("USER_CACHE_TTL", "60"))
+    # Share visits are buffered and written once this many pile up or this many seconds pass
+    SHARE_VISIT_FLUSH_EVERY: ClassVar[int] = 50
+    SHARE_VISIT_FLUSH_SECONDS: ClassVar[float] = 30.0
+    # Directory for compiled template bytecode shared across workers (unset disables)
+    JINJA_BYTECODE_CACHE_DIR: str | None = os.environ.get("JINJA_BYTECODE_CACHE_DIR")
+    # Per-IP budget for the public share page; use a shared store (e.g. redis://) with several workers
+    SHARE_VIEW_RATE_LIMIT: str = os.environ.get("SHARE_VIEW_RATE_LIMIT", "20 per minute")
+    # Reverse proxies whose X-Forwarded-For is trusted for the client IP; without it every
+    # request behind a proxy has the proxy's address and they all share one rate-limit budget
+    TRUSTED_PROXY_HOPS: int = int(os.environ.get("TRUSTED_PROXY_HOPS", "0"))
+    RATELIMIT_STORAGE_URI: str = os.environ.get("RATELIMIT_STORAGE_URI", "memory://")
     SLACK_NOTIFIER_CMD: str | None = os.environ.get("SLACK_NOTIFIER_CMD")
     # Multiple reminder thresholds (comma-separated, e.g., "7,3")
-    REMINDER_DAYS_LIST: list[int] = _parse_reminder_days(
+    REMINDER_DAYS_LIST: tuple[int, ...] = _parse_reminder_days(
         os.environ.get("REMINDER_DAYS_LIST"), "7,3"
     )
 
@@ -26,15 +46,22 @@ class DevelopmentConfig(Config):
     """Development configuration."""
 
     DEBUG: ClassVar[bool] = True
-    SQLALCHEMY_DATABASE_URI: str = os.environ.get(
-        "DATABASE_URL", "sqlite:///discount_codes.db"
-    )
+    SQLALCHEMY_DATABASE_URI: str = _DATABASE_URL
+    SQLALCHEMY_ECHO: bool = os.environ.get("SQL_ECHO", "").lower() in ("1", "true")
 
 
 class TestingConfig(Config):
     """Testing configuration."""
 
     TESTING: ClassVar[bool] = True
+    # Compiled templates are reused by the session-wide test app even if FLASK_DEBUG is set
+    TEMPLATES_AUTO_RELOAD: ClassVar[bool] = False
+    # Write every visit immediately so tests can assert on visit_count
+    SHARE_VISIT_FLUSH_EVERY: ClassVar[int] = 1
+    # Same single-proxy setup as production, so tests can send X-Forwarded-For
+    TRUSTED_PROXY_HOPS: ClassVar[int] = 1
+    # Flask-SQLAlchemy gives in-memory SQLite a StaticPool with check_same_thread=False,
+    # so the whole app shares one connection and never touches disk
     SQLALCHEMY_DATABASE_URI: ClassVar[str] = "sqlite:///:memory:"
 
 
@@ -42,7 +69,17 @@ class ProductionConfig(Config):
     """Production configuration."""
 
     DEBUG: ClassVar[bool] = False
-    SQLALCHEMY_DATABASE_URI: str = os.environ.get("DATABASE_URL", "sqlite:///discount_codes.db")
+    SQLALCHEMY_DATABASE_URI: str = _DATABASE_URL
+    # Deployed behind nginx (scripts/deploy.sh); set 0 if clients reach gunicorn directly
+    TRUSTED_PROXY_HOPS: int = int(os.environ.get("TRUSTED_PROXY_HOPS", "1"))
+    # Connection pool sized for concurrent workers; pre-ping drops dead connections
+    SQLALCHEMY_ENGINE_OPTIONS: ClassVar[dict[str, int | bool]] = {
+        "pool_size": 20,
+        "max_overflow": 40,
+        "pool_timeout": 30,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+    }
 
 
 config: dict[str, type[Config]] = {
@@ -51,3 +88,20 @@ config: dict[str, type[Config]] = {
     "production": ProductionConfig,
     "default": DevelopmentConfig,
 }
+
+
+@cache
+def config_items(config_name: str) -> tuple[tuple[str, Any], ...]:
+    """Resolve the uppercase settings of a named configuration.
+
+    Equivalent to what ``app.config.from_object`` collects, but the class is
+    walked only once per process and reused by every ``create_app`` call.
+
+    Args:
+        config_name: Key into the ``config`` mapping.
+
+    Returns:
+        Tuple of ``(key, value)`` pairs ready for ``app.config.update``.
+    """
+    config_class = config[config_name]
+    return tuple((key, getattr(config_class, key)) for key in dir(config_class) if key.isupper())
@@ -1,5 +1,7 @@
 """Flask extensions initialization."""
 
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
@@ -7,6 +9,8 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
+# Limits are per client IP and only apply to routes that opt in with @limiter.limit
+limiter = Limiter(get_remote_address)
 
 login_manager.login_view = "auth.login"
 login_manager.login_message = "Please log in to access this page."
@@ -0,0 +1,46 @@
+"""Jinja2 template filters."""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from markupsafe import Markup
+
+from app.timeutils import UTC
+
+CEST_TZ = ZoneInfo("Europe/Rome")
+
+# Pre-built fragments for the expiry_proximity filter
+_EMPTY_MARKUP = Markup("")
+_TODAY_MARKUP = Markup(" <strong>(today)</strong>")
+_ONE_DAY_MARKUP = Markup(" <strong>(in 1 day)</strong>")
+_BOLD_DAYS_MARKUP = Markup(" <strong>(in {} days)</strong>")
+_DAYS_MARKUP = Markup(" (in {} days)")
+
+
+def cest_filter(dt: datetime, fmt: str = "%b %d, %Y %H:%M") -> str:
+    """Convert a UTC datetime to CEST timezone and format it."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.astimezone(CEST_TZ).strftime(fmt)
+
+
+def expiry_proximity_filter(expiry_date: date | None, today: date | None = None) -> Markup:
+    """Return an HTML snippet showing how close the expiry date is.
+
+    Returns bold text for ≤7 days, normal text for 8-30 days,
+    or empty string if >30 days or no expiry date.
+
+    Pass ``today`` when rendering many rows to avoid looking up the date per row.
+    """
+    if expiry_date is None:
+        return _EMPTY_MARKUP
+    days_left = (expiry_date - (today or date.today())).days
+    if days_left < 0 or days_left > 30:
+        return _EMPTY_MARKUP
+    if days_left == 0:
+        return _TODAY_MARKUP
+    if days_left == 1:
+        return _ONE_DAY_MARKUP
+    if days_left <= 7:
+        return _BOLD_DAYS_MARKUP.format(days_left)
+    return _DAYS_MARKUP.format(days_left)
@@ -0,0 +1,27 @@
+"""WSGI middleware."""
+
+from collections.abc import Callable, Iterable
+from typing import Any
+
+
+class RobotsHeaderMiddleware:
+    """Add a constant X-Robots-Tag header to every response.
+
+    Runs at the WSGI layer so the header is appended to the raw header list
+    instead of going through a Flask after_request hook per response.
+    """
+
+    HEADER: tuple[str, str] = ("X-Robots-Tag", "noindex, nofollow")
+
+    def __init__(self, wsgi_app: Callable[..., Iterable[bytes]]) -> None:
+        """Wrap the given WSGI application."""
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ: dict[str, Any], start_response: Callable[..., Any]) -> Iterable[bytes]:
+        """Call the wrapped application, appending the header on start_response."""
+
+        def _start_response(status: str, headers: list[tuple[str, str]], exc_info: Any = None) -> Any:
+            headers.append(self.HEADER)
+            return start_response(status, headers, exc_info)
+
+        return self.wsgi_app(environ, _start_response)
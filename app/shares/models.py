@@ -1,17 +1,28 @@
 """Shares domain models."""
 
-import secrets
+import hashlib
+import os
 import string
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
+
+from sqlalchemy import ColumnElement
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import validates
 
 from app.extensions import db
+from app.timeutils import UTCDateTime, utcnow
+
+# Alphanumeric only: token_urlsafe would add '-' and '_' to share URLs
+_TOKEN_ALPHABET = string.ascii_letters + string.digits
+
+# Tokens are fixed-length, so they are stored as CHAR
+TOKEN_LENGTH = 8
 
+# How long a share link stays valid after creation
+SHARE_LIFETIME = timedelta(days=1)
 
-def utcnow() -> datetime:
-    """Return the current UTC time."""
-    return datetime.now(timezone.utc)
 
-def generate_token(length: int = 8) -> str:
+def generate_token(length: int = TOKEN_LENGTH) -> str:
     """Generate a random alphanumeric token.
 
     Args:
@@ -20,8 +31,35 @@ def generate_token(length: int = 8) -> str:
     Returns:
         A random alphanumeric string.
     """
-    alphabet = string.ascii_letters + string.digits
-    return "".join(secrets.choice(alphabet) for _ in range(length))
+    chars: list[str] = []
+    while len(chars) < length:
+        # One urandom read per pass; bytes >= 248 (62 * 4) are rejected so the modulo is unbiased
+        chars.extend(_TOKEN_ALPHABET[b % 62] for b in os.urandom(length * 2) if b < 248)
+    return "".join(chars[:length])
+
+
+def is_well_formed_token(token: str) -> bool:
+    """Check whether a string could be a token produced by generate_token.
+
+    Args:
+        token: The candidate share token.
+
+    Returns:
+        True if the token has the expected length and alphabet.
+    """
+    return len(token) == TOKEN_LENGTH and token.isascii() and token.isalnum()
+
+
+def hash_token(token: str) -> str:
+    """Return the SHA-256 hex digest used to look up a share token.
+
+    Args:
+        token: The raw share token.
+
+    Returns:
+        Hex-encoded SHA-256 digest of the token.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 class Share(db.Model):
@@ -30,34 +68,52 @@ class Share(db.Model):
     __tablename__ = "shares"
 
     id: int = db.Column(db.Integer, primary_key=True)
-    token: str = db.Column(db.String(16), unique=True, nullable=False)
+    token: str = db.Column(db.CHAR(TOKEN_LENGTH), unique=True, nullable=False)
+    # Lookups go through the hash so the index probe reveals nothing about the raw token
+    token_hash: str = db.Column(db.CHAR(64), unique=True, index=True, nullable=False)
     discount_code_id: int = db.Column(
         db.Integer, db.ForeignKey("discount_codes.id"), nullable=False
     )
-    created_at: datetime = db.Column(db.DateTime(timezone=True), default=utcnow)
-    expires_at: datetime = db.Column(db.DateTime(timezone=True), nullable=False)
+    created_at: datetime = db.Column(UTCDateTime, default=utcnow)
+    expires_at: datetime = db.Column(UTCDateTime, nullable=False)
     visit_count: int = db.Column(db.Integer, nullable=False, default=0)
     created_by: int = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
 
     discount_code = db.relationship("DiscountCode", backref="shares")
     creator = db.relationship("User", backref="shares")
 
+    # token needs no extra index: its UNIQUE constraint is already backed by one
+    __table_args__ = (
+        # Matches list_shares: filter by created_by, newest first
+        db.Index("ix_shares_created_by_created_at", "created_by", created_at.desc()),
+        # create_share probes for a live share of the same code by the same user
+        db.Index("ix_shares_code_creator_expires", "discount_code_id", "created_by", "expires_at"),
+    )
+
     def __init__(self, **kwargs) -> None:
         """Initialize a Share with auto-generated token and expiration."""
         if "token" not in kwargs:
             kwargs["token"] = generate_token()
         if "expires_at" not in kwargs:
-            kwargs["expires_at"] = utcnow() + timedelta(days=1)
+            kwargs["expires_at"] = utcnow() + SHARE_LIFETIME
         super().__init__(**kwargs)
 
-    @property
+    @validates("token")
+    def _set_token_hash(self, key: str, value: str) -> str:
+        """Keep token_hash in sync with token."""
+        self.token_hash = hash_token(value)
+        return value
+
+    @hybrid_property
     def is_expired(self) -> bool:
         """Check if the share link has expired."""
-        expires_at = self.expires_at
-        # Ensure expires_at is timezone-aware
-        if expires_at.tzinfo is None:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
-        return utcnow() > expires_at
+        return utcnow() > self.expires_at
+
+    @is_expired.inplace.expression
+    @classmethod
+    def _is_expired_expression(cls) -> ColumnElement[bool]:
+        """SQL form of is_expired, usable in WHERE clauses."""
+        return cls.expires_at < utcnow()
 
     def __repr__(self) -> str:
         """Return string representation of Share."""
@@ -1,18 +1,45 @@
 """Shares domain routes."""
 
-from flask import Blueprint, abort, flash, redirect, render_template, url_for
+import hashlib
+from datetime import date
+
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask_login import current_user, login_required
+from sqlalchemy import exists, insert, literal
+from sqlalchemy.orm import joinedload
 from werkzeug.wrappers import Response
 
 from app.codes.models import DiscountCode
-from app.extensions import db
-from app.shares.models import Share
+from app.extensions import db, limiter
+from app.shares.models import (
+    SHARE_LIFETIME,
+    Share,
+    generate_token,
+    hash_token,
+    is_well_formed_token,
+)
+from app.timeutils import utcnow
 
 bp = Blueprint("shares", __name__, url_prefix="/shares")
 
+# Seconds browsers and CDNs may reuse a share page without revalidating
+SHARE_CACHE_MAX_AGE = 60
+
 
 @bp.route("/<token>")
-def view_share(token: str) -> str:
+# Checked before the view runs, so token guessing is throttled ahead of any query
+@limiter.limit(lambda: current_app.config["SHARE_VIEW_RATE_LIMIT"])
+def view_share(token: str) -> str | Response:
     """View a shared discount code.
 
     This route is public and does not require authentication.
@@ -21,17 +48,70 @@ def view_share(token: str) -> str:
         token: The unique share token.
 
     Returns:
-        Rendered share view or expired template.
+        Rendered share view (or 304 if the client's copy is current), or expired template.
+        Clients over SHARE_VIEW_RATE_LIMIT get a 429 instead.
     """
-    share = Share.query.filter_by(token=token).first_or_404()
-
-    if share.is_expired:
+    # Guessed tokens of the wrong shape never reach the database
+    if not is_well_formed_token(token):
+        abort(404)
+
+    token_hash = hash_token(token)
+    # A miss is a plain None row, so no Share is built for unknown tokens.
+    # Let the database evaluate expiry alongside the lookup
+    row = db.session.execute(
+        db.select(Share, Share.is_expired).where(Share.token_hash == token_hash)
+    ).first()
+    if row is None:
+        abort(404)
+
+    share, is_expired = row
+    if is_expired:
         return render_template("shares/expired.html")
 
-    share.visit_count += 1
-    db.session.commit()
+    code = share.discount_code
+    etag = _share_etag(share, code)
+    if request.if_none_match.contains(etag):
+        # The client already has this page: skip rendering and don't count a visit
+        response = make_response("", 304)
+    else:
+        response = make_response(render_template("shares/view.html", share=share, code=code))
+        # Buffered rather than committed per visit; see VisitBuffer
+        current_app.extensions["share_visits"].record(share.id)
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    # Never let caches serve the link past its expiry
+    seconds_left = int((share.expires_at - utcnow()).total_seconds())
+    response.cache_control.max_age = max(0, min(SHARE_CACHE_MAX_AGE, seconds_left))
+    return response
 
-    return render_template("shares/view.html", share=share, code=share.discount_code)
+
+def _share_etag(share: Share, code: DiscountCode) -> str:
+    """Build an ETag from everything the share page displays.
+
+    Codes have no modification timestamp, so the displayed fields are hashed
+    directly. Today's date is included because the page shows days until expiry.
+
+    Args:
+        share: The share being viewed.
+        code: The shared discount code.
+
+    Returns:
+        Hex digest identifying the current page content.
+    """
+    parts = (
+        share.id,
+        share.created_at,
+        share.expires_at,
+        code.code,
+        code.store_name,
+        code.discount_value,
+        code.expiry_date,
+        code.notes,
+        code.store_url,
+        date.today(),
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
 
 
 @bp.route("/create/<int:code_id>", methods=["POST"])
@@ -45,16 +125,52 @@ def create_share(code_id: int) -> Response:
     Returns:
         Redirect to the share view page.
     """
-    discount_code = db.get_or_404(DiscountCode, code_id)
-
-    if not discount_code.is_shareable:
-        abort(400)
+    # A live share of this code by this user is reused, so a double-click
+    # doesn't leave a second token behind
+    live_share = db.and_(
+        Share.discount_code_id == code_id,
+        Share.created_by == current_user.id,
+        ~Share.is_expired,
+    )
+    token = generate_token()
+    now = utcnow()
+    # INSERT ... SELECT bypasses the ORM, so every column value is given explicitly
+    values = {
+        "discount_code_id": code_id,
+        "created_by": current_user.id,
+        "token": token,
+        "token_hash": hash_token(token),
+        "created_at": now,
+        "expires_at": now + SHARE_LIFETIME,
+        "visit_count": 0,
+    }
+    columns = Share.__table__.c
+    # The shareable check runs inside the INSERT, so no code row is fetched
+    # and a code used concurrently can't slip through
+    source = db.select(
+        *(literal(value, columns[key].type) for key, value in values.items())
+    ).where(
+        exists().where(DiscountCode.id == code_id, DiscountCode.is_shareable),
+        ~exists().where(live_share),
+    )
+    result = db.session.execute(insert(Share).from_select(list(values), source))
+
+    if result.rowcount == 0:
+        # Nothing inserted: the code is missing, unshareable, or already shared
+        discount_code = db.get_or_404(DiscountCode, code_id)
+        if not discount_code.is_shareable:
+            abort(400)
+        existing_token = db.session.scalar(
+            db.select(Share.token).where(live_share).order_by(Share.expires_at.desc()).limit(1)
+        )
+        if existing_token is not None:
+            return redirect(url_for("shares.view_share", token=existing_token))
+        # The live share expired after the INSERT ran, so create the new one after all
+        db.session.execute(insert(Share).values(values))
 
-    share = Share(discount_code_id=discount_code.id, created_by=current_user.id)
-    db.session.add(share)
     db.session.commit()
 
-    return redirect(url_for("shares.view_share", token=share.token))
+    return redirect(url_for("shares.view_share", token=token))
 
 
 @bp.route("/")
@@ -65,8 +181,12 @@ def list_shares() -> str:
     Returns:
         Rendered list of shared links.
     """
+    # Show this worker's buffered visits in the counts
+    current_app.extensions["share_visits"].flush()
+    # The list renders each share's code and creator, so load them in the same query
     shares = (
-        Share.query.filter_by(created_by=current_user.id)
+        Share.query.options(joinedload(Share.discount_code), joinedload(Share.creator))
+        .filter_by(created_by=current_user.id)
         .order_by(Share.created_at.desc())
         .all()
     )
@@ -0,0 +1,89 @@
+"""Write-behind buffer for share visit counts."""
+
+import threading
+import time
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.shares.models import Share
+
+
+class VisitBuffer:
+    """Accumulate share visits in memory and write them to the database in batches.
+
+    The public share page would otherwise commit once per visit. Pending counts
+    are flushed once ``flush_every`` visits have accumulated or ``max_age``
+    seconds have passed since the last flush, using one executemany UPDATE.
+    A failed write puts its counts back to be retried with the next flush;
+    counts still buffered when a worker exits are lost.
+    """
+
+    def __init__(self, flush_every: int, max_age: float) -> None:
+        """Create an empty buffer.
+
+        Args:
+            flush_every: Number of buffered visits that triggers a flush.
+            max_age: Seconds after the last flush at which the next visit flushes.
+        """
+        self.flush_every = flush_every
+        self.max_age = max_age
+        self._pending: Counter[int] = Counter()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, share_id: int) -> None:
+        """Count one visit to a share, flushing the buffer if it is due."""
+        with self._lock:
+            self._pending[share_id] += 1
+            due = (
+                self._pending.total() >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.max_age
+            )
+            batch = self._take() if due else None
+        if batch:
+            self._write_or_requeue(batch)
+
+    def flush(self) -> None:
+        """Write all buffered visits to the database now."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._write_or_requeue(batch)
+
+    def _take(self) -> Counter[int]:
+        """Swap out the pending counts; the caller must hold the lock."""
+        batch, self._pending = self._pending, Counter()
+        self._last_flush = time.monotonic()
+        return batch
+
+    def _write_or_requeue(self, batch: Counter[int]) -> None:
+        """Write a taken batch, returning its counts to the buffer if that fails.
+
+        Flushes run on share page GETs, so a database error is logged rather
+        than turning the page into a 500.
+        """
+        try:
+            self._write(batch)
+        except SQLAlchemyError:
+            db.session.rollback()
+            with self._lock:
+                self._pending.update(batch)
+            current_app.logger.exception(
+                "Failed to write %d buffered share visits; keeping them for the next flush",
+                batch.total(),
+            )
+
+    @staticmethod
+    def _write(batch: Counter[int]) -> None:
+        """Add the batched deltas to visit_count and commit."""
+        shares = Share.__table__
+        db.session.execute(
+            shares.update()
+            .where(shares.c.id == db.bindparam("share_id"))
+            .values(visit_count=shares.c.visit_count + db.bindparam("delta")),
+            [{"share_id": share_id, "delta": delta} for share_id, delta in batch.items()],
+        )
+        db.session.commit()
@@ -0,0 +1,40 @@
+"""Shared time helpers."""
+
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any
+
+from sqlalchemy import DateTime
+from sqlalchemy.types import TypeDecorator
+
+UTC = timezone.utc
+
+
+# Return the current UTC datetime; a partial avoids an extra Python frame per call
+utcnow = partial(datetime.now, UTC)
+
+
+class UTCDateTime(TypeDecorator):
+    """Timezone-aware DateTime that always stores and returns UTC.
+
+    SQLite has no timezone support and hands back naive datetimes even for
+    ``DateTime(timezone=True)`` columns; this stamps UTC on load so model code
+    can compare against ``utcnow()`` directly.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect: Any) -> datetime | None:
+        """Normalize aware values to UTC; naive values are assumed to be UTC."""
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=UTC)
+        return value.astimezone(UTC)
+
+    def process_result_value(self, value: datetime | None, dialect: Any) -> datetime | None:
+        """Attach UTC to naive values loaded from the database."""
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=UTC)
+        return value
@@ -0,0 +1,52 @@
+"""Tests for the user cache used by Flask-Login."""
+
+from unittest.mock import patch
+
+from flask import Flask
+
+from app import load_user
+from app.auth.cache import UserCache
+from app.auth.models import User
+
+
+def test_user_cache_returns_fresh_entries() -> None:
+    """Test cached values are returned until they expire."""
+    cache = UserCache(ttl=60)
+    cache.set(1, {"id": 1, "username": "alice"})
+    assert cache.get(1) == {"id": 1, "username": "alice"}
+
+    with patch("app.auth.cache.time.monotonic", return_value=10**12):
+        assert cache.get(1) is None
+
+
+def test_user_cache_disabled_with_zero_ttl() -> None:
+    """Test a zero TTL never stores entries."""
+    cache = UserCache(ttl=0)
+    cache.set(1, {"id": 1})
+    assert cache.get(1) is None
+
+
+def test_user_cache_evicts_oldest_when_full() -> None:
+    """Test the oldest entry is evicted once maxsize is reached."""
+    cache = UserCache(ttl=60, maxsize=2)
+    cache.set(1, {"id": 1})
+    cache.set(2, {"id": 2})
+    cache.set(3, {"id": 3})
+    assert cache.get(1) is None
+    assert cache.get(2) is not None
+    assert cache.get(3) is not None
+
+
+def test_load_user_uses_cache(app: Flask, db, test_user: User) -> None:
+    """Test load_user returns a detached user and caches its columns."""
+    user = load_user(str(test_user.id))
+    assert user.username == "testuser"
+    assert app.extensions["user_cache"].get(test_user.id)["username"] == "testuser"
+    assert load_user("9999") is None
+
+
+def test_set_password_invalidates_cache(app: Flask, db, test_user: User) -> None:
+    """Test changing a password drops the user from the cache."""
+    load_user(str(test_user.id))
+    test_user.set_password("newpassword")
+    assert app.extensions["user_cache"].get(test_user.id) is None
@@ -1,6 +1,19 @@
 """Tests for auth domain routes."""
 
+from unittest.mock import patch
+
+from argon2 import PasswordHasher
+from flask import Flask
 from flask.testing import FlaskClient
+from werkzeug.security import generate_password_hash
+
+from app.auth.models import User
+
+
+def _flashed_messages(client: FlaskClient) -> list[str]:
+    """Read pending flash messages from the client's session without rendering a page."""
+    with client.session_transaction() as session:
+        return [message for _category, message in session.get("_flashes", [])]
 
 
 def test_login_page_loads(client: FlaskClient, db) -> None:
@@ -15,10 +28,11 @@ def test_login_with_valid_credentials(client: FlaskClient, test_user) -> None:
     response = client.post(
         "/auth/login",
         data={"username": "testuser", "password": "testpassword"},
-        follow_redirects=True,
     )
-    assert response.status_code == 200
-    assert b"Discount Code Manager" in response.data
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
+    with client.session_transaction() as session:
+        assert session["_user_id"] == str(test_user.id)
 
 
 def test_login_with_invalid_credentials(client: FlaskClient, test_user) -> None:
@@ -31,6 +45,29 @@ def test_login_with_invalid_credentials(client: FlaskClient, test_user) -> None:
     assert b"Invalid username or password" in response.data
 
 
+def test_login_with_unknown_user_checks_dummy_hash(client: FlaskClient, db) -> None:
+    """Test an unknown username still runs a password hash verification."""
+    with patch.object(User, "check_password", autospec=True, return_value=False) as check:
+        response = client.post(
+            "/auth/login",
+            data={"username": "nobody", "password": "whatever"},
+            follow_redirects=True,
+        )
+    assert b"Invalid username or password" in response.data
+    check.assert_called_once()
+    assert check.call_args[0][0].password_hash.startswith("$argon2id$")
+
+
+def test_login_with_unknown_user_only_verifies(
+    app: Flask, client: FlaskClient, db
+) -> None:
+    """Test the dummy hash is built with the app, so unknown logins never hash."""
+    assert app.extensions["dummy_password_hash"].startswith("$argon2id$")
+    with patch.object(PasswordHasher, "hash", autospec=True) as hash_:
+        client.post("/auth/login", data={"username": "nobody", "password": "whatever"})
+    hash_.assert_not_called()
+
+
 def test_login_with_missing_credentials(client: FlaskClient, db) -> None:
     """Test login with missing credentials."""
     response = client.post(
@@ -43,6 +80,22 @@ def test_login_with_missing_credentials(client: FlaskClient, db) -> None:
 
 def test_logout(authenticated_client: FlaskClient) -> None:
     """Test logout functionality."""
-    response = authenticated_client.get("/auth/logout", follow_redirects=True)
-    assert response.status_code == 200
-    assert b"You have been logged out" in response.data
+    response = authenticated_client.get("/auth/logout")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/auth/login"
+    assert _flashed_messages(authenticated_client) == ["You have been logged out."]
+
+
+def test_login_upgrades_legacy_password_hash(client: FlaskClient, db) -> None:
+    """Test a successful login rehashes a legacy Werkzeug hash with argon2."""
+    # Any Werkzeug method takes the legacy path; one pbkdf2 round keeps it cheap
+    legacy_hash = generate_password_hash("oldpass", method="pbkdf2:sha256:1")
+    user = User(username="legacyuser", password_hash=legacy_hash)
+    db.session.add(user)
+    db.session.commit()
+
+    client.post("/auth/login", data={"username": "legacyuser", "password": "oldpass"})
+
+    db.session.refresh(user)
+    assert user.password_hash.startswith("$argon2id$")
+    assert user.check_password("oldpass") is True
@@ -17,12 +17,11 @@ def test_discount_code_creation(db, test_user: User) -> None:
     db.session.add(code)
     db.session.commit()
 
-    saved_code = db.session.get(DiscountCode, code.id)
-    assert saved_code is not None
-    assert saved_code.code == "SAVE20"
-    assert saved_code.store_name == "Test Store"
-    assert saved_code.discount_value == "20%"
-    assert saved_code.user_id == test_user.id
+    assert code.id is not None
+    assert code.code == "SAVE20"
+    assert code.store_name == "Test Store"
+    assert code.discount_value == "20%"
+    assert code.user_id == test_user.id
 
 
 def test_discount_code_defaults(db, test_user: User) -> None:
@@ -35,9 +34,8 @@ def test_discount_code_defaults(db, test_user: User) -> None:
     db.session.add(code)
     db.session.commit()
 
-    saved_code = db.session.get(DiscountCode, code.id)
-    assert saved_code.is_used is False
-    assert isinstance(saved_code.created_at, datetime)
+    assert code.is_used is False
+    assert isinstance(code.created_at, datetime)
 
 
 def test_discount_code_with_expiry(db, test_user: User) -> None:
@@ -52,8 +50,7 @@ def test_discount_code_with_expiry(db, test_user: User) -> None:
     db.session.add(code)
     db.session.commit()
 
-    saved_code = db.session.get(DiscountCode, code.id)
-    assert saved_code.expiry_date == expiry
+    assert code.expiry_date == expiry
 
 
 def test_discount_code_repr(db) -> None:
@@ -76,8 +73,27 @@ def test_discount_code_with_store_url(db, test_user: User) -> None:
     db.session.add(code)
     db.session.commit()
 
-    saved_code = db.session.get(DiscountCode, code.id)
-    assert saved_code.store_url == "https://example.com"
+    assert code.store_url == "https://example.com"
+
+
+def test_discount_code_lowercased_search_columns(db, test_user: User) -> None:
+    """Test lowercased store columns follow store_name and store_url."""
+    code = DiscountCode(
+        code="LOWER10",
+        store_name="Mixed Case Store",
+        store_url="https://Example.COM",
+        user_id=test_user.id,
+    )
+    db.session.add(code)
+    db.session.commit()
+    assert code.store_name_lower == "mixed case store"
+    assert code.store_url_lower == "https://example.com"
+
+    code.store_name = "Renamed STORE"
+    code.store_url = None
+    db.session.commit()
+    assert code.store_name_lower == "renamed store"
+    assert code.store_url_lower is None
 
 
 def test_discount_code_is_expired_false_when_no_expiry(db, test_user: User) -> None:
@@ -93,12 +109,14 @@ def test_discount_code_is_expired_false_when_no_expiry(db, test_user: User) -> N
     assert code.is_expired is False
 
 
-def test_discount_code_is_expired_false_when_future(db, test_user: User) -> None:
+def test_discount_code_is_expired_false_when_future(
+    db, test_user: User, today: date
+) -> None:
     """Test is_expired is False when expiry date is in the future."""
     code = DiscountCode(
         code="FUTURE",
         store_name="Future Store",
-        expiry_date=date.today() + timedelta(days=7),
+        expiry_date=today + timedelta(days=7),
         user_id=test_user.id,
     )
     db.session.add(code)
@@ -107,12 +125,14 @@ def test_discount_code_is_expired_false_when_future(db, test_user: User) -> None
     assert code.is_expired is False
 
 
-def test_discount_code_is_expired_true_when_past(db, test_user: User) -> None:
+def test_discount_code_is_expired_true_when_past(
+    db, test_user: User, today: date
+) -> None:
     """Test is_expired is True when expiry date is in the past."""
     code = DiscountCode(
         code="PAST",
         store_name="Past Store",
-        expiry_date=date.today() - timedelta(days=1),
+        expiry_date=today - timedelta(days=1),
         user_id=test_user.id,
     )
     db.session.add(code)
@@ -121,12 +141,14 @@ def test_discount_code_is_expired_true_when_past(db, test_user: User) -> None:
     assert code.is_expired is True
 
 
-def test_discount_code_is_shareable_true_when_valid(db, test_user: User) -> None:
+def test_discount_code_is_shareable_true_when_valid(
+    db, test_user: User, today: date
+) -> None:
     """Test is_shareable is True for unused, non-expired code."""
     code = DiscountCode(
         code="SHAREABLE",
         store_name="Shareable Store",
-        expiry_date=date.today() + timedelta(days=7),
+        expiry_date=today + timedelta(days=7),
         is_used=False,
         user_id=test_user.id,
     )
@@ -150,12 +172,14 @@ def test_discount_code_is_shareable_false_when_used(db, test_user: User) -> None
     assert code.is_shareable is False
 
 
-def test_discount_code_is_shareable_false_when_expired(db, test_user: User) -> None:
+def test_discount_code_is_shareable_false_when_expired(
+    db, test_user: User, today: date
+) -> None:
     """Test is_shareable is False when code is expired."""
     code = DiscountCode(
         code="EXPIRED",
         store_name="Expired Store",
-        expiry_date=date.today() - timedelta(days=1),
+        expiry_date=today - timedelta(days=1),
         is_used=False,
         user_id=test_user.id,
     )
@@ -165,6 +189,36 @@ def test_discount_code_is_shareable_false_when_expired(db, test_user: User) -> N
     assert code.is_shareable is False
 
 
+def test_discount_code_is_shareable_filters_in_sql(
+    db, test_user: User, today: date
+) -> None:
+    """Test is_shareable and is_expired can be used as query filters."""
+    no_expiry = DiscountCode(code="OPEN", store_name="Store", user_id=test_user.id)
+    future = DiscountCode(
+        code="FUTURE",
+        store_name="Store",
+        expiry_date=today + timedelta(days=1),
+        user_id=test_user.id,
+    )
+    expired = DiscountCode(
+        code="PAST",
+        store_name="Store",
+        expiry_date=today - timedelta(days=1),
+        user_id=test_user.id,
+    )
+    used = DiscountCode(code="USED", store_name="Store", is_used=True, user_id=test_user.id)
+    db.session.add_all([no_expiry, future, expired, used])
+    db.session.commit()
+
+    def matching(condition) -> set[str]:
+        return set(db.session.scalars(db.select(DiscountCode.code).where(condition)))
+
+    assert matching(DiscountCode.is_shareable) == {"OPEN", "FUTURE"}
+    assert matching(~DiscountCode.is_shareable) == {"PAST", "USED"}
+    assert matching(DiscountCode.is_expired) == {"PAST"}
+    assert matching(~DiscountCode.is_expired) == {"OPEN", "FUTURE", "USED"}
+
+
 def test_discount_code_user_relationship(db, test_user: User) -> None:
     """Test discount code user relationship."""
     code = DiscountCode(
@@ -175,6 +229,5 @@ def test_discount_code_user_relationship(db, test_user: User) -> None:
     db.session.add(code)
     db.session.commit()
 
-    saved_code = db.session.get(DiscountCode, code.id)
-    assert saved_code.user == test_user
-    assert saved_code.user.username == "testuser"
+    assert code.user == test_user
+    assert code.user.username == "testuser"
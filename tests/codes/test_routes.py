@@ -1,16 +1,25 @@
 """Tests for codes domain routes."""
 
+import re
 from datetime import date, timedelta
 
+import pytest
 from flask.testing import FlaskClient
 
 from app.auth.models import User
 from app.codes.models import DiscountCode
+from app.codes.routes import CODES_PER_PAGE, _codes_statement
 
 
 def _get_test_user(db) -> User:
     """Get the test user from the database."""
-    return User.query.filter_by(username="testuser").first()
+    return db.session.execute(db.select(User).filter_by(username="testuser")).scalar_one()
+
+
+def _flashed_messages(client: FlaskClient) -> list[str]:
+    """Read pending flash messages from the client's session without rendering a page."""
+    with client.session_transaction() as session:
+        return [message for _category, message in session.get("_flashes", [])]
 
 
 def test_homepage_requires_login(client: FlaskClient, db) -> None:
@@ -20,36 +29,21 @@ def test_homepage_requires_login(client: FlaskClient, db) -> None:
     assert "/auth/login" in response.headers["Location"]
 
 
-def test_homepage_status_authenticated(authenticated_client: FlaskClient) -> None:
-    """Test homepage returns 200 status when authenticated."""
+def test_homepage_authenticated(authenticated_client: FlaskClient) -> None:
+    """Test an authenticated homepage renders the page with its empty state."""
     response = authenticated_client.get("/")
     assert response.status_code == 200
+    data = response.data
+    assert b"</html>" in data
+    assert b"Discount Code Manager" in data
+    # No codes exist yet
+    assert b"No discount codes yet" in data
+    assert b"Add your first code" in data
 
 
-def test_homepage_content_authenticated(authenticated_client: FlaskClient) -> None:
-    """Test homepage contains expected content when authenticated."""
-    response = authenticated_client.get("/")
-    assert b"Discount Code Manager" in response.data
-
-
-def test_homepage_shows_empty_state(authenticated_client: FlaskClient) -> None:
-    """Test homepage shows empty state when no codes exist."""
-    response = authenticated_client.get("/")
-    assert b"No discount codes yet" in response.data
-    assert b"Add your first code" in response.data
-
-
-def test_homepage_displays_codes(authenticated_client: FlaskClient, db) -> None:
+def test_homepage_displays_codes(authenticated_client: FlaskClient, make_code) -> None:
     """Test homepage displays discount codes."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="TEST10",
-        store_name="Test Store",
-        discount_value="10%",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    make_code(code="TEST10", store_name="Test Store", discount_value="10%")
 
     response = authenticated_client.get("/")
     assert b"TEST10" in response.data
@@ -57,52 +51,29 @@ def test_homepage_displays_codes(authenticated_client: FlaskClient, db) -> None:
     assert b"10%" in response.data
 
 
-def test_homepage_codes_sorted_by_expiry(authenticated_client: FlaskClient, db) -> None:
+def test_homepage_codes_sorted_by_expiry(
+    authenticated_client: FlaskClient, make_codes, today: date
+) -> None:
     """Test homepage displays codes sorted by expiry date ascending."""
-    user = _get_test_user(db)
-    today = date.today()
-    code1 = DiscountCode(
-        code="LATER",
-        store_name="Later Store",
-        expiry_date=today + timedelta(days=30),
-        user_id=user.id,
-    )
-    code2 = DiscountCode(
-        code="SOONER",
-        store_name="Sooner Store",
-        expiry_date=today + timedelta(days=10),
-        user_id=user.id,
+    make_codes(
+        {"code": "LATER", "expiry_date": today + timedelta(days=30)},
+        {"code": "SOONER", "expiry_date": today + timedelta(days=10)},
+        {"code": "NOEXPIRY"},
     )
-    code3 = DiscountCode(
-        code="NOEXPIRY",
-        store_name="No Expiry Store",
-        user_id=user.id,
-    )
-    db.session.add_all([code1, code2, code3])
-    db.session.commit()
 
-    response = authenticated_client.get("/")
-    data = response.data.decode()
-
-    sooner_pos = data.find("SOONER")
-    later_pos = data.find("LATER")
-    noexpiry_pos = data.find("NOEXPIRY")
+    data = authenticated_client.get("/").data
 
-    assert sooner_pos < later_pos < noexpiry_pos
+    # One pass over the page; each code can appear several times in its card
+    first_seen = dict.fromkeys(re.findall(rb"SOONER|LATER|NOEXPIRY", data))
+    assert list(first_seen) == [b"SOONER", b"LATER", b"NOEXPIRY"]
 
 
-def test_homepage_shows_expired_codes(authenticated_client: FlaskClient, db) -> None:
+def test_homepage_shows_expired_codes(
+    authenticated_client: FlaskClient, make_code, today: date
+) -> None:
     """Test homepage shows expired codes with expired label when viewing all."""
-    user = _get_test_user(db)
-    yesterday = date.today() - timedelta(days=1)
-    code = DiscountCode(
-        code="EXPIRED10",
-        store_name="Expired Store",
-        expiry_date=yesterday,
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    yesterday = today - timedelta(days=1)
+    make_code(code="EXPIRED10", store_name="Expired Store", expiry_date=yesterday)
 
     response = authenticated_client.get("/?expiration=all")
     assert b"EXPIRED10" in response.data
@@ -128,16 +99,29 @@ def test_add_code_with_required_fields(authenticated_client: FlaskClient, db) ->
     response = authenticated_client.post(
         "/codes/add",
         data={"code": "SAVE20", "store_name": "Test Store"},
-        follow_redirects=True,
     )
-    assert response.status_code == 200
-    assert b"Discount code added successfully" in response.data
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
+    assert _flashed_messages(authenticated_client) == ["Discount code added successfully!"]
 
-    code = DiscountCode.query.filter_by(code="SAVE20").first()
+    code = db.session.execute(
+        db.select(DiscountCode).filter_by(code="SAVE20")
+    ).scalar_one_or_none()
     assert code is not None
     assert code.store_name == "Test Store"
 
 
+def test_homepage_flash_shown_once(authenticated_client: FlaskClient, db) -> None:
+    """Test a flash on the homepage is consumed by the page that shows it."""
+    authenticated_client.post(
+        "/codes/add",
+        data={"code": "ONCE10", "store_name": "Once Store"},
+    )
+
+    assert b"Discount code added successfully!" in authenticated_client.get("/").data
+    assert b"Discount code added successfully!" not in authenticated_client.get("/").data
+
+
 def test_add_code_with_all_fields(authenticated_client: FlaskClient, db) -> None:
     """Test adding a discount code with all fields."""
     response = authenticated_client.post(
@@ -150,11 +134,13 @@ def test_add_code_with_all_fields(authenticated_client: FlaskClient, db) -> None
             "notes": "Test notes",
             "store_url": "https://example.com",
         },
-        follow_redirects=True,
     )
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
 
-    code = DiscountCode.query.filter_by(code="FULL20").first()
+    code = db.session.execute(
+        db.select(DiscountCode).filter_by(code="FULL20")
+    ).scalar_one_or_none()
     assert code is not None
     assert code.discount_value == "20%"
     assert code.notes == "Test notes"
@@ -166,9 +152,13 @@ def test_add_code_missing_required_fields(authenticated_client: FlaskClient) ->
     response = authenticated_client.post(
         "/codes/add",
         data={"code": "", "store_name": ""},
-        follow_redirects=True,
     )
-    assert b"Code and store name are required" in response.data
+    assert response.headers["Location"] == "/codes/add"
+
+    # The error renders on the page redirected to, and only there
+    message = b"Code and store name are required."
+    assert message in authenticated_client.get(response.headers["Location"]).data
+    assert message not in authenticated_client.get("/codes/add").data
 
 
 def test_add_code_invalid_date(authenticated_client: FlaskClient) -> None:
@@ -180,46 +170,96 @@ def test_add_code_invalid_date(authenticated_client: FlaskClient) -> None:
             "store_name": "Test Store",
             "expiry_date": "invalid-date",
         },
-        follow_redirects=True,
     )
-    assert b"Invalid date format" in response.data
+    assert response.headers["Location"] == "/codes/add"
+    assert _flashed_messages(authenticated_client) == ["Invalid date format."]
+
+
+@pytest.mark.parametrize(
+    ("path", "data", "expected"),
+    [
+        (
+            "/codes/add",
+            {"code": "HTMX20", "store_name": "HTMX Store"},
+            [b"Discount code added successfully", b"Add Another"],
+        ),
+        (
+            "/codes/{code_id}/edit",
+            {"code": "HTMXUPDATED", "store_name": "Updated HTMX Store"},
+            [b"Discount code updated successfully", b"HTMXUPDATED for Updated HTMX Store"],
+        ),
+    ],
+    ids=["add", "edit"],
+)
+def test_code_form_htmx_request_returns_partial(
+    authenticated_client: FlaskClient,
+    make_code,
+    path: str,
+    data: dict[str, str],
+    expected: list[bytes],
+) -> None:
+    """Test submitting the add or edit form via HTMX returns the success partial."""
+    code = make_code(code="HTMX10", store_name="HTMX Store")
+
+    response = authenticated_client.post(
+        path.format(code_id=code.id), data=data, headers={"HX-Request": "true"}
+    )
+    assert response.status_code == 200
+    for text in expected:
+        assert text in response.data
 
 
-def test_add_code_htmx_request(authenticated_client: FlaskClient, db) -> None:
-    """Test adding a discount code via HTMX returns partial."""
+def test_add_code_htmx_validation_error_returns_partial(
+    authenticated_client: FlaskClient,
+) -> None:
+    """Test a failed HTMX submit returns only the error fragment."""
     response = authenticated_client.post(
         "/codes/add",
-        data={"code": "HTMX20", "store_name": "HTMX Store"},
+        data={"code": "", "store_name": ""},
+        headers={"HX-Request": "true"},
+    )
+    assert response.status_code == 200
+    assert b"Code and store name are required" in response.data
+    assert b"<html" not in response.data
+
+
+def test_edit_code_htmx_validation_error_returns_partial(
+    authenticated_client: FlaskClient, db, make_code
+) -> None:
+    """Test a failed HTMX edit submit returns only the error fragment."""
+    code = make_code(code="HTMXEDIT", store_name="HTMX Edit Store")
+
+    response = authenticated_client.post(
+        f"/codes/{code.id}/edit",
+        data={"code": "", "store_name": ""},
         headers={"HX-Request": "true"},
     )
     assert response.status_code == 200
-    assert b"Discount code added successfully" in response.data
-    assert b"Add Another" in response.data
+    assert response.data.lstrip().startswith(b'<div class="p-4 bg-red-100')
+    assert b"Code and store name are required." in response.data
+    assert b"<html" not in response.data
+    # The code is left as it was
+    db.session.expire(code)
+    assert code.code == "HTMXEDIT"
 
 
-def test_edit_code_page_requires_login(client: FlaskClient, db, test_user: User) -> None:
+def test_edit_code_page_requires_login(client: FlaskClient, make_code) -> None:
     """Test edit code page redirects to login when not authenticated."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = client.get(f"/codes/{code.id}/edit")
     assert response.status_code == 302
     assert "/auth/login" in response.headers["Location"]
 
 
-def test_edit_code_page_loads(authenticated_client: FlaskClient, db) -> None:
+def test_edit_code_page_loads(authenticated_client: FlaskClient, make_code) -> None:
     """Test edit code page loads with prefilled values."""
-    user = _get_test_user(db)
-    code = DiscountCode(
+    code = make_code(
         code="EDIT10",
         store_name="Edit Store",
         discount_value="10%",
         notes="Test notes",
-        user_id=user.id,
     )
-    db.session.add(code)
-    db.session.commit()
 
     response = authenticated_client.get(f"/codes/{code.id}/edit")
     assert response.status_code == 200
@@ -236,12 +276,11 @@ def test_edit_code_page_404_for_nonexistent(authenticated_client: FlaskClient) -
     assert response.status_code == 404
 
 
-def test_edit_code_updates_fields(authenticated_client: FlaskClient, db) -> None:
+def test_edit_code_updates_fields(
+    authenticated_client: FlaskClient, db, make_code
+) -> None:
     """Test editing a discount code updates all fields."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="OLD10", store_name="Old Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="OLD10", store_name="Old Store")
 
     response = authenticated_client.post(
         f"/codes/{code.id}/edit",
@@ -253,12 +292,12 @@ def test_edit_code_updates_fields(authenticated_client: FlaskClient, db) -> None
             "notes": "Updated notes",
             "store_url": "https://example.com",
         },
-        follow_redirects=True,
     )
-    assert response.status_code == 200
-    assert b"Discount code updated successfully" in response.data
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
+    assert _flashed_messages(authenticated_client) == ["Discount code updated successfully!"]
 
-    db.session.refresh(code)
+    db.session.expire(code)
     assert code.code == "NEW20"
     assert code.store_name == "New Store"
     assert code.discount_value == "20%"
@@ -266,27 +305,23 @@ def test_edit_code_updates_fields(authenticated_client: FlaskClient, db) -> None
     assert code.store_url == "https://example.com"
 
 
-def test_edit_code_missing_required_fields(authenticated_client: FlaskClient, db) -> None:
+def test_edit_code_missing_required_fields(
+    authenticated_client: FlaskClient, make_code
+) -> None:
     """Test editing a discount code with missing required fields."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = authenticated_client.post(
         f"/codes/{code.id}/edit",
         data={"code": "", "store_name": ""},
-        follow_redirects=True,
     )
-    assert b"Code and store name are required" in response.data
+    assert response.headers["Location"] == f"/codes/{code.id}/edit"
+    assert _flashed_messages(authenticated_client) == ["Code and store name are required."]
 
 
-def test_edit_code_invalid_date(authenticated_client: FlaskClient, db) -> None:
+def test_edit_code_invalid_date(authenticated_client: FlaskClient, make_code) -> None:
     """Test editing a discount code with invalid date format."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = authenticated_client.post(
         f"/codes/{code.id}/edit",
@@ -295,64 +330,39 @@ def test_edit_code_invalid_date(authenticated_client: FlaskClient, db) -> None:
             "store_name": "Test Store",
             "expiry_date": "invalid-date",
         },
-        follow_redirects=True,
     )
-    assert b"Invalid date format" in response.data
-
+    assert response.headers["Location"] == f"/codes/{code.id}/edit"
+    assert _flashed_messages(authenticated_client) == ["Invalid date format."]
 
-def test_edit_code_htmx_request(authenticated_client: FlaskClient, db) -> None:
-    """Test editing a discount code via HTMX returns partial."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="HTMX10", store_name="HTMX Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
 
-    response = authenticated_client.post(
-        f"/codes/{code.id}/edit",
-        data={"code": "HTMXUPDATED", "store_name": "Updated HTMX Store"},
-        headers={"HX-Request": "true"},
-    )
-    assert response.status_code == 200
-    assert b"Discount code updated successfully" in response.data
-    assert b"HTMXUPDATED for Updated HTMX Store" in response.data
-
-
-def test_homepage_shows_edit_icon(authenticated_client: FlaskClient, db) -> None:
+def test_homepage_shows_edit_icon(authenticated_client: FlaskClient, make_code) -> None:
     """Test homepage displays edit icon for each code."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = authenticated_client.get("/")
     assert f"/codes/{code.id}/edit".encode() in response.data
 
 
-def test_delete_code_requires_login(client: FlaskClient, db, test_user: User) -> None:
+def test_delete_code_requires_login(client: FlaskClient, make_code) -> None:
     """Test delete code redirects to login when not authenticated."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = client.post(f"/codes/{code.id}/delete")
     assert response.status_code == 302
     assert "/auth/login" in response.headers["Location"]
 
 
-def test_delete_code_removes_code(authenticated_client: FlaskClient, db) -> None:
+def test_delete_code_removes_code(
+    authenticated_client: FlaskClient, db, make_code
+) -> None:
     """Test deleting a discount code removes it from the database."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="DELETE10", store_name="Delete Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="DELETE10", store_name="Delete Store")
     code_id = code.id
 
-    response = authenticated_client.post(
-        f"/codes/{code_id}/delete",
-        follow_redirects=True,
-    )
-    assert response.status_code == 200
-    assert b"Discount code deleted successfully" in response.data
+    response = authenticated_client.post(f"/codes/{code_id}/delete")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
+    assert _flashed_messages(authenticated_client) == ["Discount code deleted successfully!"]
 
     deleted_code = db.session.get(DiscountCode, code_id)
     assert deleted_code is None
@@ -364,28 +374,19 @@ def test_delete_code_404_for_nonexistent(authenticated_client: FlaskClient) -> N
     assert response.status_code == 404
 
 
-def test_homepage_shows_delete_icon(authenticated_client: FlaskClient, db) -> None:
+def test_homepage_shows_delete_icon(authenticated_client: FlaskClient, make_code) -> None:
     """Test homepage displays delete icon for each code."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = authenticated_client.get("/")
     assert f"/codes/{code.id}/delete".encode() in response.data
 
 
-def test_homepage_displays_store_url(authenticated_client: FlaskClient, db) -> None:
+def test_homepage_displays_store_url(
+    authenticated_client: FlaskClient, make_code
+) -> None:
     """Test homepage displays store URL as a link when present."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="URLTEST",
-        store_name="URL Store",
-        store_url="https://example.com",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    make_code(code="URLTEST", store_name="URL Store", store_url="https://example.com")
 
     response = authenticated_client.get("/")
     assert b"https://example.com" in response.data
@@ -395,21 +396,52 @@ def test_homepage_displays_store_url(authenticated_client: FlaskClient, db) -> N
 # Search and filter tests
 
 
-def test_homepage_displays_search_form(authenticated_client: FlaskClient) -> None:
-    """Test homepage displays search form."""
-    response = authenticated_client.get("/")
-    assert b'name="search"' in response.data
-    assert b'name="expiration"' in response.data
-    assert b"Search by store name or URL" in response.data
+@pytest.mark.parametrize(
+    ("query_string", "present", "absent"),
+    [
+        (
+            "",
+            [
+                'name="search"',
+                'name="expiration"',
+                "Search by store name or URL",
+                'name="user_id"',
+                "All users",
+                # The user filter lists users from the database
+                "testuser",
+            ],
+            # No Clear link without filters
+            ['class="px-6 py-2 bg-gray-200'],
+        ),
+        ("?search=TestSearch", ['value="TestSearch"', "Clear"], []),
+        ("?expiration=active", ['value="active" selected'], []),
+        ("?expiration=expired", ["Clear"], []),
+        ("?expiration=all", ["Clear"], []),
+        ("?user_id={user_id}", ['value="{user_id}" selected', "Clear"], []),
+    ],
+    ids=["no-filters", "search", "active", "expired", "all", "user"],
+)
+def test_homepage_filter_form(
+    authenticated_client: FlaskClient,
+    test_user: User,
+    query_string: str,
+    present: list[str],
+    absent: list[str],
+) -> None:
+    """Test the filter form renders its fields, keeps submitted values and shows Clear."""
+    response = authenticated_client.get("/" + query_string.format(user_id=test_user.id))
+    for text in present:
+        assert text.format(user_id=test_user.id).encode() in response.data
+    for text in absent:
+        assert text.encode() not in response.data
 
 
-def test_search_by_store_name(authenticated_client: FlaskClient, db) -> None:
+def test_search_by_store_name(authenticated_client: FlaskClient, make_codes) -> None:
     """Test searching discount codes by store name."""
-    user = _get_test_user(db)
-    code1 = DiscountCode(code="CODE1", store_name="Amazon Store", user_id=user.id)
-    code2 = DiscountCode(code="CODE2", store_name="Target Store", user_id=user.id)
-    db.session.add_all([code1, code2])
-    db.session.commit()
+    make_codes(
+        {"code": "CODE1", "store_name": "Amazon Store"},
+        {"code": "CODE2", "store_name": "Target Store"},
+    )
 
     response = authenticated_client.get("/?search=Amazon")
     assert b"CODE1" in response.data
@@ -417,155 +449,84 @@ def test_search_by_store_name(authenticated_client: FlaskClient, db) -> None:
     assert b"CODE2" not in response.data
 
 
-def test_search_by_store_url(authenticated_client: FlaskClient, db) -> None:
+def test_search_by_store_url(authenticated_client: FlaskClient, make_codes) -> None:
     """Test searching discount codes by store URL."""
-    user = _get_test_user(db)
-    code1 = DiscountCode(
-        code="CODE1",
-        store_name="Store 1",
-        store_url="https://amazon.com",
-        user_id=user.id,
+    make_codes(
+        {"code": "CODE1", "store_url": "https://amazon.com"},
+        {"code": "CODE2", "store_url": "https://target.com"},
     )
-    code2 = DiscountCode(
-        code="CODE2",
-        store_name="Store 2",
-        store_url="https://target.com",
-        user_id=user.id,
-    )
-    db.session.add_all([code1, code2])
-    db.session.commit()
 
     response = authenticated_client.get("/?search=amazon.com")
     assert b"CODE1" in response.data
     assert b"CODE2" not in response.data
 
 
-def test_search_case_insensitive(authenticated_client: FlaskClient, db) -> None:
+def test_search_case_insensitive(authenticated_client: FlaskClient, make_code) -> None:
     """Test search is case insensitive."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="CODE1", store_name="Amazon Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    make_code(code="CODE1", store_name="Amazon Store")
 
     response = authenticated_client.get("/?search=amazon")
     assert b"CODE1" in response.data
     assert b"Amazon Store" in response.data
 
 
-def test_default_filter_is_active(authenticated_client: FlaskClient, db) -> None:
-    """Test homepage defaults to showing only active codes."""
-    user = _get_test_user(db)
-    today = date.today()
-    active_code = DiscountCode(
-        code="ACTIVE",
-        store_name="Active Store",
-        expiry_date=today + timedelta(days=10),
-        user_id=user.id,
-    )
-    expired_code = DiscountCode(
-        code="EXPIRED",
-        store_name="Expired Store",
-        expiry_date=today - timedelta(days=1),
-        user_id=user.id,
-    )
-    no_expiry_code = DiscountCode(
-        code="NOEXPIRY",
-        store_name="No Expiry Store",
-        user_id=user.id,
-    )
-    db.session.add_all([active_code, expired_code, no_expiry_code])
-    db.session.commit()
-
-    response = authenticated_client.get("/")
-    assert b"ACTIVE" in response.data
-    assert b"NOEXPIRY" in response.data
-    assert b"EXPIRED" not in response.data
-
-
-def test_filter_active_codes(authenticated_client: FlaskClient, db) -> None:
-    """Test filtering to show only active (non-expired) codes."""
-    user = _get_test_user(db)
-    today = date.today()
-    active_code = DiscountCode(
-        code="ACTIVE",
-        store_name="Active Store",
-        expiry_date=today + timedelta(days=10),
-        user_id=user.id,
-    )
-    expired_code = DiscountCode(
-        code="EXPIRED",
-        store_name="Expired Store",
-        expiry_date=today - timedelta(days=1),
-        user_id=user.id,
-    )
-    no_expiry_code = DiscountCode(
-        code="NOEXPIRY",
-        store_name="No Expiry Store",
-        user_id=user.id,
-    )
-    db.session.add_all([active_code, expired_code, no_expiry_code])
-    db.session.commit()
-
-    response = authenticated_client.get("/?expiration=active")
-    assert b"ACTIVE" in response.data
-    assert b"NOEXPIRY" in response.data
-    assert b"EXPIRED" not in response.data
-
-
-def test_filter_expired_codes(authenticated_client: FlaskClient, db) -> None:
-    """Test filtering to show only expired codes."""
-    user = _get_test_user(db)
-    today = date.today()
-    active_code = DiscountCode(
-        code="ACTIVE",
-        store_name="Active Store",
-        expiry_date=today + timedelta(days=10),
-        user_id=user.id,
-    )
-    expired_code = DiscountCode(
-        code="EXPIRED",
-        store_name="Expired Store",
-        expiry_date=today - timedelta(days=1),
-        user_id=user.id,
-    )
-    no_expiry_code = DiscountCode(
-        code="NOEXPIRY",
-        store_name="No Expiry Store",
-        user_id=user.id,
-    )
-    db.session.add_all([active_code, expired_code, no_expiry_code])
-    db.session.commit()
-
-    response = authenticated_client.get("/?expiration=expired")
-    assert b"EXPIRED" in response.data
-    assert b"ACTIVE" not in response.data
-    assert b"NOEXPIRY" not in response.data
+@pytest.fixture
+def code_triplet(make_codes, today: date) -> list[DiscountCode]:
+    """Create an active, an expired and a never-expiring code."""
+    return make_codes(
+        {"code": "ACTIVE", "expiry_date": today + timedelta(days=10)},
+        {"code": "EXPIRED", "expiry_date": today - timedelta(days=1)},
+        {"code": "NOEXPIRY"},
+    )
+
+
+@pytest.mark.parametrize(
+    ("query_string", "visible", "hidden"),
+    [
+        # The homepage defaults to active codes
+        ("", [b"ACTIVE", b"NOEXPIRY"], [b"EXPIRED"]),
+        ("?expiration=active", [b"ACTIVE", b"NOEXPIRY"], [b"EXPIRED"]),
+        ("?expiration=expired", [b"EXPIRED"], [b"ACTIVE", b"NOEXPIRY"]),
+        ("?expiration=all", [b"ACTIVE", b"EXPIRED", b"NOEXPIRY"], []),
+    ],
+    ids=["default", "active", "expired", "all"],
+)
+def test_expiration_filter(
+    authenticated_client: FlaskClient,
+    code_triplet: list[DiscountCode],
+    query_string: str,
+    visible: list[bytes],
+    hidden: list[bytes],
+) -> None:
+    """Test the expiration filter shows only the matching codes."""
+    response = authenticated_client.get(f"/{query_string}")
+    for code in visible:
+        assert code in response.data
+    for code in hidden:
+        assert code not in response.data
 
 
-def test_search_and_filter_combined(authenticated_client: FlaskClient, db) -> None:
+def test_search_and_filter_combined(
+    authenticated_client: FlaskClient, make_codes, today: date
+) -> None:
     """Test combining search and expiration filter."""
-    user = _get_test_user(db)
-    today = date.today()
-    code1 = DiscountCode(
-        code="AMAZON10",
-        store_name="Amazon Store",
-        expiry_date=today + timedelta(days=10),
-        user_id=user.id,
-    )
-    code2 = DiscountCode(
-        code="AMAZON20",
-        store_name="Amazon Outlet",
-        expiry_date=today - timedelta(days=1),
-        user_id=user.id,
-    )
-    code3 = DiscountCode(
-        code="TARGET10",
-        store_name="Target Store",
-        expiry_date=today + timedelta(days=10),
-        user_id=user.id,
+    make_codes(
+        {
+            "code": "AMAZON10",
+            "store_name": "Amazon Store",
+            "expiry_date": today + timedelta(days=10),
+        },
+        {
+            "code": "AMAZON20",
+            "store_name": "Amazon Outlet",
+            "expiry_date": today - timedelta(days=1),
+        },
+        {
+            "code": "TARGET10",
+            "store_name": "Target Store",
+            "expiry_date": today + timedelta(days=10),
+        },
     )
-    db.session.add_all([code1, code2, code3])
-    db.session.commit()
 
     response = authenticated_client.get("/?search=Amazon&expiration=active")
     assert b"AMAZON10" in response.data
@@ -573,88 +534,113 @@ def test_search_and_filter_combined(authenticated_client: FlaskClient, db) -> No
     assert b"TARGET10" not in response.data
 
 
-def test_search_no_results_message(authenticated_client: FlaskClient, db) -> None:
+def test_search_no_results_message(authenticated_client: FlaskClient, make_code) -> None:
     """Test empty state message when search returns no results."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="CODE1", store_name="Amazon Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    make_code(code="CODE1", store_name="Amazon Store")
 
     response = authenticated_client.get("/?search=NonexistentStore")
     assert b"No discount codes match your search criteria" in response.data
     assert b"Clear filters" in response.data
 
 
-def test_search_preserves_input_value(authenticated_client: FlaskClient) -> None:
-    """Test search input preserves the search value after submit."""
-    response = authenticated_client.get("/?search=TestSearch")
-    assert b'value="TestSearch"' in response.data
-
+def test_homepage_paginates_codes(
+    authenticated_client: FlaskClient, make_codes, today: date
+) -> None:
+    """Test homepage splits codes across pages and keeps filters in page links."""
+    make_codes(
+        *(
+            {
+                "code": f"PAGE{i:03d}",
+                "store_name": "Paged Store",
+                "expiry_date": today + timedelta(days=i),
+            }
+            for i in range(CODES_PER_PAGE + 1)
+        )
+    )
+
+    response = authenticated_client.get("/?search=Paged")
+    assert b"PAGE000" in response.data
+    assert f"PAGE{CODES_PER_PAGE:03d}".encode() not in response.data
+    assert b"Page 1 of 2" in response.data
+    assert b"page=2" in response.data
+    assert b"search=Paged" in response.data
+
+    response = authenticated_client.get("/?search=Paged&page=2")
+    assert f"PAGE{CODES_PER_PAGE:03d}".encode() in response.data
+    assert b"PAGE000" not in response.data
+
+
+def test_homepage_out_of_range_page_shows_last_page(
+    authenticated_client: FlaskClient, make_codes, count_queries
+) -> None:
+    """Test a page past the end shows the last page instead of the empty state."""
+    make_codes(*({"code": f"PAGE{n:03d}"} for n in range(CODES_PER_PAGE + 1)))
 
-def test_filter_preserves_selection(authenticated_client: FlaskClient) -> None:
-    """Test expiration filter preserves the selected value after submit."""
-    response = authenticated_client.get("/?expiration=active")
-    assert b'value="active" selected' in response.data
+    with count_queries() as queries:
+        response = authenticated_client.get("/?page=99")
+    assert response.status_code == 200
+    # One COUNT and one page SELECT, not a second round for the clamped page
+    assert len([q for q in queries if "discount_codes" in q]) == 2
+    assert b"Page 2 of 2" in response.data
+    assert f"PAGE{CODES_PER_PAGE:03d}".encode() in response.data
+    assert b"No discount codes yet" not in response.data
 
 
-def test_clear_button_shown_with_filters(authenticated_client: FlaskClient) -> None:
-    """Test clear button is shown when filters are applied."""
-    response = authenticated_client.get("/?search=test")
-    assert b"Clear" in response.data
+def test_homepage_out_of_range_page_without_codes_shows_empty_state(
+    authenticated_client: FlaskClient,
+) -> None:
+    """Test a page past the end of an empty list renders the empty state."""
+    response = authenticated_client.get("/?page=99")
+    assert response.status_code == 200
+    assert b"No discount codes yet" in response.data
 
-    response = authenticated_client.get("/?expiration=expired")
-    assert b"Clear" in response.data
 
-    response = authenticated_client.get("/?expiration=all")
-    assert b"Clear" in response.data
+def test_listing_statement_reused_per_filter_shape(
+    authenticated_client: FlaskClient,
+) -> None:
+    """Test unknown expiration values share the cached 'all' statement."""
+    # Other tests may already have built this shape, so it must not be cached yet
+    _codes_statement.cache_clear()
+    before = _codes_statement.cache_info()
 
+    authenticated_client.get("/?expiration=bogus&search=a")
+    authenticated_client.get("/?expiration=whatever&search=b")
+    after = _codes_statement.cache_info()
 
-def test_clear_button_hidden_without_filters(authenticated_client: FlaskClient) -> None:
-    """Test clear button is hidden when no filters are applied."""
-    response = authenticated_client.get("/")
-    # Check that Clear button is not present (but Search button is)
-    data = response.data.decode()
-    assert "Search" in data
-    # The Clear link should not be present when no filters
-    assert 'class="px-6 py-2 bg-gray-200' not in data
+    # The first request builds the 'all' shape; the second reuses it
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 1
+    assert after.currsize - before.currsize == 1
 
 
 # Mark as used tests
 
 
-def test_mark_used_requires_login(client: FlaskClient, db, test_user: User) -> None:
+def test_mark_used_requires_login(client: FlaskClient, make_code) -> None:
     """Test mark used redirects to login when not authenticated."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = client.post(f"/codes/{code.id}/mark-used")
     assert response.status_code == 302
     assert "/auth/login" in response.headers["Location"]
 
 
-def test_mark_used_marks_code(authenticated_client: FlaskClient, db) -> None:
-    """Test marking a discount code as used updates the database."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="MARKME",
-        store_name="Mark Store",
-        is_used=False,
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+def test_mark_used_marks_code(
+    authenticated_client: FlaskClient, db, make_code, count_queries
+) -> None:
+    """Test marking a discount code as used updates it without loading it first."""
+    code = make_code(code="MARKME", store_name="Mark Store", is_used=False)
     code_id = code.id
+    # Requests share the test's session; empty it as a fresh request would
+    db.session.expunge_all()
 
-    response = authenticated_client.post(
-        f"/codes/{code_id}/mark-used",
-        follow_redirects=True,
-    )
-    assert response.status_code == 200
-    assert b"Discount code marked as used" in response.data
-
-    db.session.refresh(code)
-    assert code.is_used is True
+    with count_queries() as queries:
+        response = authenticated_client.post(f"/codes/{code_id}/mark-used")
+    assert not [q for q in queries if q.startswith("SELECT") and "discount_codes" in q]
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
+    assert _flashed_messages(authenticated_client) == ["Discount code marked as used!"]
+    assert db.session.get(DiscountCode, code_id).is_used is True
 
 
 def test_mark_used_404_for_nonexistent(authenticated_client: FlaskClient) -> None:
@@ -664,36 +650,20 @@ def test_mark_used_404_for_nonexistent(authenticated_client: FlaskClient) -> Non
 
 
 def test_homepage_shows_mark_used_icon_for_unused(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, make_code
 ) -> None:
     """Test homepage displays mark as used icon for unused codes."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="UNUSED",
-        store_name="Unused Store",
-        is_used=False,
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="UNUSED", store_name="Unused Store", is_used=False)
 
     response = authenticated_client.get("/")
     assert f"/codes/{code.id}/mark-used".encode() in response.data
 
 
 def test_homepage_hides_mark_used_icon_for_used(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, make_code
 ) -> None:
     """Test homepage hides mark as used icon for already used codes."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="USED",
-        store_name="Used Store",
-        is_used=True,
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="USED", store_name="Used Store", is_used=True)
 
     response = authenticated_client.get("/")
     assert f"/codes/{code.id}/mark-used".encode() not in response.data
@@ -704,85 +674,81 @@ def test_add_code_sets_user_id(authenticated_client: FlaskClient, db) -> None:
     response = authenticated_client.post(
         "/codes/add",
         data={"code": "USER10", "store_name": "User Store"},
-        follow_redirects=True,
     )
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
 
-    code = DiscountCode.query.filter_by(code="USER10").first()
+    code = db.session.execute(
+        db.select(DiscountCode).filter_by(code="USER10")
+    ).scalar_one_or_none()
     assert code is not None
     assert code.user_id is not None
     assert code.user is not None
     assert code.user.username == "testuser"
 
 
-def test_edit_code_updates_user_id(authenticated_client: FlaskClient, db) -> None:
+def test_edit_code_updates_user_id(
+    authenticated_client: FlaskClient, db, make_code
+) -> None:
     """Test editing a code updates the user_id to the current user."""
     user = _get_test_user(db)
     # Create a code with user_id (required now)
-    code = DiscountCode(code="TOEDIT", store_name="To Edit Store", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TOEDIT", store_name="To Edit Store")
 
     response = authenticated_client.post(
         f"/codes/{code.id}/edit",
         data={"code": "EDITED", "store_name": "Edited Store"},
-        follow_redirects=True,
     )
-    assert response.status_code == 200
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
 
-    db.session.refresh(code)
+    db.session.expire(code)
     assert code.user_id == user.id
     assert code.user.username == "testuser"
 
 
 def test_homepage_displays_edited_by_username(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, make_code
 ) -> None:
     """Test homepage displays 'edited by username' for codes with user_id."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="SHOWUSER",
-        store_name="Show User Store",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    make_code(code="SHOWUSER", store_name="Show User Store")
 
     response = authenticated_client.get("/")
     assert b"edited by testuser" in response.data
 
 
-# User filter tests
+def test_homepage_query_count_does_not_grow_with_codes(
+    authenticated_client: FlaskClient,
+    test_user: User,
+    make_codes,
+    make_user,
+    count_queries,
+    strict_loading,
+) -> None:
+    """Test rendering many codes from several users needs no per-code queries."""
+    other_user = make_user("otheruser")
+    make_codes(*({"user": other_user if n % 2 else test_user} for n in range(10)))
 
+    # Lazy loads raise, so a relationship the template needs must be eager-loaded
+    with count_queries() as queries, strict_loading():
+        data = authenticated_client.get("/").data
 
-def test_homepage_displays_user_filter(authenticated_client: FlaskClient) -> None:
-    """Test homepage displays user filter select."""
-    response = authenticated_client.get("/")
-    assert b'name="user_id"' in response.data
-    assert b"All users" in response.data
+    assert b"edited by testuser" in data
+    assert b"edited by otheruser" in data
+    # Current user, page of codes, pagination count, user filter options
+    assert len(queries) <= 4
 
 
-def test_homepage_populates_user_filter_with_users(
-    authenticated_client: FlaskClient, db
-) -> None:
-    """Test homepage user filter is populated with users from database."""
-    # The testuser already exists from authenticated_client fixture
-    response = authenticated_client.get("/")
-    assert b"testuser" in response.data
+# User filter tests
 
 
-def test_filter_by_user_id(authenticated_client: FlaskClient, db) -> None:
+def test_filter_by_user_id(
+    authenticated_client: FlaskClient, test_user: User, make_user, make_codes
+) -> None:
     """Test filtering discount codes by user_id."""
-    user1 = _get_test_user(db)
-    user2 = User(username="otheruser")
-    user2.set_password("password")
-    db.session.add(user2)
-    db.session.commit()
-
-    code1 = DiscountCode(code="CODE1", store_name="Store 1", user_id=user1.id)
-    code2 = DiscountCode(code="CODE2", store_name="Store 2", user_id=user2.id)
-    db.session.add_all([code1, code2])
-    db.session.commit()
+    user1 = test_user
+    user2 = make_user("otheruser")
+    make_codes({"code": "CODE1"}, {"code": "CODE2", "user": user2})
 
     response = authenticated_client.get(f"/?user_id={user1.id}")
     assert b"CODE1" in response.data
@@ -794,19 +760,10 @@ def test_filter_by_user_id(authenticated_client: FlaskClient, db) -> None:
 
 
 def test_filter_by_user_id_shows_all_when_empty(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, make_user, make_codes
 ) -> None:
     """Test filtering with empty user_id shows all codes."""
-    user1 = _get_test_user(db)
-    user2 = User(username="otheruser")
-    user2.set_password("password")
-    db.session.add(user2)
-    db.session.commit()
-
-    code1 = DiscountCode(code="CODE1", store_name="Store 1", user_id=user1.id)
-    code2 = DiscountCode(code="CODE2", store_name="Store 2", user_id=user2.id)
-    db.session.add_all([code1, code2])
-    db.session.commit()
+    make_codes({"code": "CODE1"}, {"code": "CODE2", "user": make_user("otheruser")})
 
     response = authenticated_client.get("/?user_id=")
     assert b"CODE1" in response.data
@@ -814,102 +771,64 @@ def test_filter_by_user_id_shows_all_when_empty(
 
 
 def test_filter_by_user_id_combined_with_search(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, test_user: User, make_user, make_codes
 ) -> None:
     """Test combining user_id filter with search."""
-    user1 = _get_test_user(db)
-    user2 = User(username="otheruser")
-    user2.set_password("password")
-    db.session.add(user2)
-    db.session.commit()
-
-    code1 = DiscountCode(code="AMAZON1", store_name="Amazon Store", user_id=user1.id)
-    code2 = DiscountCode(code="AMAZON2", store_name="Amazon Outlet", user_id=user2.id)
-    code3 = DiscountCode(code="TARGET1", store_name="Target Store", user_id=user1.id)
-    db.session.add_all([code1, code2, code3])
-    db.session.commit()
+    make_codes(
+        {"code": "AMAZON1", "store_name": "Amazon Store"},
+        {"code": "AMAZON2", "store_name": "Amazon Outlet", "user": make_user("otheruser")},
+        {"code": "TARGET1", "store_name": "Target Store"},
+    )
 
-    response = authenticated_client.get(f"/?search=Amazon&user_id={user1.id}")
+    response = authenticated_client.get(f"/?search=Amazon&user_id={test_user.id}")
     assert b"AMAZON1" in response.data
     assert b"AMAZON2" not in response.data
     assert b"TARGET1" not in response.data
 
 
 def test_filter_by_user_id_combined_with_expiration(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient,
+    test_user: User,
+    make_user,
+    make_codes,
+    today: date,
 ) -> None:
     """Test combining user_id filter with expiration filter."""
-    user1 = _get_test_user(db)
-    user2 = User(username="otheruser")
-    user2.set_password("password")
-    db.session.add(user2)
-    db.session.commit()
-
-    today = date.today()
-    code1 = DiscountCode(
-        code="ACTIVE1",
-        store_name="Active Store 1",
-        expiry_date=today + timedelta(days=10),
-        user_id=user1.id,
-    )
-    code2 = DiscountCode(
-        code="EXPIRED1",
-        store_name="Expired Store 1",
-        expiry_date=today - timedelta(days=1),
-        user_id=user1.id,
-    )
-    code3 = DiscountCode(
-        code="ACTIVE2",
-        store_name="Active Store 2",
-        expiry_date=today + timedelta(days=10),
-        user_id=user2.id,
+    make_codes(
+        {"code": "ACTIVE1", "expiry_date": today + timedelta(days=10)},
+        {"code": "EXPIRED1", "expiry_date": today - timedelta(days=1)},
+        {
+            "code": "ACTIVE2",
+            "expiry_date": today + timedelta(days=10),
+            "user": make_user("otheruser"),
+        },
     )
-    db.session.add_all([code1, code2, code3])
-    db.session.commit()
 
-    response = authenticated_client.get(f"/?expiration=active&user_id={user1.id}")
+    response = authenticated_client.get(f"/?expiration=active&user_id={test_user.id}")
     assert b"ACTIVE1" in response.data
     assert b"EXPIRED1" not in response.data
     assert b"ACTIVE2" not in response.data
 
 
-def test_user_filter_preserves_selection(authenticated_client: FlaskClient, db) -> None:
-    """Test user filter preserves the selected value after submit."""
-    user = _get_test_user(db)
-    response = authenticated_client.get(f"/?user_id={user.id}")
-    assert f'value="{user.id}" selected'.encode() in response.data
-
-
-def test_clear_button_shown_with_user_filter(
-    authenticated_client: FlaskClient, db
+def test_user_filter_invalid_id_ignored(
+    authenticated_client: FlaskClient, make_code
 ) -> None:
-    """Test clear button is shown when user filter is applied."""
-    user = _get_test_user(db)
-    response = authenticated_client.get(f"/?user_id={user.id}")
-    assert b"Clear" in response.data
-
-
-def test_user_filter_invalid_id_ignored(authenticated_client: FlaskClient, db) -> None:
     """Test invalid user_id is ignored and shows all codes."""
-    user = _get_test_user(db)
-    code = DiscountCode(code="CODE1", store_name="Store 1", user_id=user.id)
-    db.session.add(code)
-    db.session.commit()
+    make_code(code="CODE1", store_name="Store 1")
 
     response = authenticated_client.get("/?user_id=invalid")
     assert b"CODE1" in response.data
 
 
-def test_user_filter_no_results_message(authenticated_client: FlaskClient, db) -> None:
+def test_user_filter_no_results_message(
+    authenticated_client: FlaskClient, db, make_user
+) -> None:
     """Test empty state message when user filter returns no results."""
     user1 = _get_test_user(db)
-    user2 = User(username="otheruser")
-    user2.set_password("password")
-    db.session.add(user2)
-    db.session.commit()
+    user2 = make_user("otheruser")
 
     code = DiscountCode(code="CODE1", store_name="Store 1", user_id=user1.id)
-    db.session.add(code)
+    db.session.add_all([user2, code])
     db.session.commit()
 
     response = authenticated_client.get(f"/?user_id={user2.id}")
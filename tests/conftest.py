@@ -1,22 +1,63 @@
 """Pytest fixtures for testing."""
 
+import itertools
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from datetime import date
+from functools import cache
+
 import pytest
 from flask import Flask
 from flask.testing import FlaskClient
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, raiseload, scoped_session, sessionmaker
 
 from app import create_app
 from app.auth.models import User
+from app.codes.models import DiscountCode
 from app.extensions import db as _db
+from app.extensions import limiter
+from app.shares.models import Share
 
 
-@pytest.fixture
-def app() -> Flask:
-    """Create application for testing.
+@cache
+def _hashed_password(password: str) -> str:
+    """Hash a password once per session; argon2 is deliberately slow."""
+    user = User()
+    user.set_password(password)
+    return user.password_hash
 
-    Returns:
+
+def _disable_pysqlite_transactions(dbapi_connection, connection_record) -> None:
+    """Stop pysqlite from managing transactions so SAVEPOINTs nest correctly."""
+    dbapi_connection.isolation_level = None
+
+
+def _emit_begin(connection) -> None:
+    """Start transactions explicitly now that pysqlite no longer does."""
+    connection.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def app() -> Iterator[Flask]:
+    """Create application for testing, once per test session.
+
+    The schema is created once on the in-memory database; the ``db`` fixture
+    isolates each test in a transaction instead of recreating tables. Tests
+    that change settings must use ``monkeypatch.setitem(app.config, ...)`` so
+    the change is undone (see ``tests/test_cli.py``); tests that need
+    different startup config should build their own app with ``create_app``.
+
+    Yields:
         Flask application configured for testing.
     """
-    return create_app("testing")
+    app = create_app("testing")
+    with app.app_context():
+        # Registered before the first connection so "connect" sees it
+        event.listen(_db.engine, "connect", _disable_pysqlite_transactions)
+        event.listen(_db.engine, "begin", _emit_begin)
+        _db.create_all()
+    yield app
 
 
 @pytest.fixture
@@ -32,55 +73,285 @@ def client(app: Flask) -> FlaskClient:
     return app.test_client()
 
 
+@pytest.fixture(scope="session")
+def session_user(app: Flask) -> int:
+    """Create the shared test user once, outside every test's transaction.
+
+    Hashing and committing happen once per session; per-test changes to the
+    user are rolled back with the rest of the test's data.
+
+    Args:
+        app: Flask application fixture.
+
+    Returns:
+        ID of the test user.
+    """
+    with app.app_context():
+        user = User(username="testuser", password_hash=_hashed_password("testpassword"))
+        _db.session.add(user)
+        _db.session.commit()
+        return user.id
+
+
+@pytest.fixture(scope="session")
+def session_cookie(app: Flask, session_user: int) -> str:
+    """Log the test user in once and keep the signed session cookie.
+
+    Args:
+        app: Flask application fixture.
+        session_user: ID of the shared test user.
+
+    Returns:
+        Value of the session cookie for the logged-in test user.
+    """
+    client = app.test_client()
+    client.post("/auth/login", data={"username": "testuser", "password": "testpassword"})
+    return client.get_cookie(app.config["SESSION_COOKIE_NAME"]).value
+
+
 @pytest.fixture
-def db(app: Flask):
-    """Create database for testing.
+def db(app: Flask, session_user: int):
+    """Run a test inside a transaction that is rolled back afterwards.
 
-    Creates all tables before test and drops them after.
+    The session joins an outer transaction on a dedicated connection, so every
+    ``commit()`` in app or test code only releases a SAVEPOINT.
 
     Args:
         app: Flask application fixture.
+        session_user: ID of the shared test user, present in every test.
 
     Yields:
         SQLAlchemy database instance.
     """
     with app.app_context():
-        _db.create_all()
-        yield _db
-        _db.drop_all()
+        connection = _db.engine.connect()
+        transaction = connection.begin()
+        original_session = _db.session
+        _db.session = scoped_session(
+            sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
+        )
+        # Per-app state would otherwise carry over between tests
+        app.extensions["user_cache"].clear()
+        limiter.reset()
+        try:
+            yield _db
+        finally:
+            _db.session.remove()
+            _db.session = original_session
+            transaction.rollback()
+            connection.close()
 
 
 @pytest.fixture
-def test_user(db) -> User:
-    """Create a test user.
+def test_user(db, session_user: int) -> User:
+    """Return the shared test user, loaded into the test's session.
 
     Args:
         db: Database fixture.
+        session_user: ID of the shared test user.
 
     Returns:
         Test user instance.
     """
-    user = User(username="testuser")
-    user.set_password("testpassword")
-    db.session.add(user)
-    db.session.commit()
-    return user
+    return db.session.get(User, session_user)
 
 
 @pytest.fixture
-def authenticated_client(client: FlaskClient, test_user: User) -> FlaskClient:
-    """Create an authenticated test client.
+def authenticated_client(
+    app: Flask, client: FlaskClient, test_user: User, session_cookie: str
+) -> FlaskClient:
+    """Create a test client logged in as the test user.
+
+    Reuses the session-wide login cookie instead of posting to /auth/login.
 
     Args:
+        app: Flask application fixture.
         client: Flask test client.
         test_user: Test user fixture.
+        session_cookie: Signed session cookie of the logged-in test user.
 
     Returns:
         Authenticated Flask test client.
     """
-    client.post(
-        "/auth/login",
-        data={"username": "testuser", "password": "testpassword"},
-        follow_redirects=True,
-    )
+    client.set_cookie(app.config["SESSION_COOKIE_NAME"], session_cookie)
     return client
+
+
+@pytest.fixture
+def today() -> date:
+    """Return the date a test builds its expiry dates from.
+
+    Read once per test so every relative date in it agrees. The app's own
+    clock isn't frozen: the session-wide login cookie carries a signing
+    timestamp, and a clock moved behind it would reject the cookie.
+
+    Returns:
+        Today's date.
+    """
+    return date.today()
+
+
+@pytest.fixture
+def make_user() -> Callable[..., User]:
+    """Return a factory for unsaved users with a pre-hashed password.
+
+    Returns:
+        Callable taking a username (and optional password) and returning a User.
+    """
+
+    def _make_user(username: str, password: str = "password") -> User:
+        return User(username=username, password_hash=_hashed_password(password))
+
+    return _make_user
+
+
+@pytest.fixture
+def build_code(test_user: User) -> Callable[..., DiscountCode]:
+    """Return a factory for unsaved discount codes.
+
+    ``code`` and ``store_name`` default to unique placeholders and the code
+    belongs to the test user unless ``user`` or ``user_id`` is given.
+
+    Args:
+        test_user: Test user fixture.
+
+    Returns:
+        Callable taking DiscountCode fields and returning an unsaved code.
+    """
+    sequence = itertools.count(1)
+
+    def _build_code(**fields) -> DiscountCode:
+        n = next(sequence)
+        fields = {"code": f"CODE{n}", "store_name": f"Store {n}", **fields}
+        if "user" not in fields:
+            fields.setdefault("user_id", test_user.id)
+        return DiscountCode(**fields)
+
+    return _build_code
+
+
+@pytest.fixture
+def make_codes(db, build_code) -> Callable[..., list[DiscountCode]]:
+    """Return a factory that commits several discount codes at once.
+
+    Each spec is a dict of DiscountCode fields, defaulted as by ``build_code``.
+    All codes are flushed in one commit.
+
+    Args:
+        db: Database fixture.
+        build_code: Factory for unsaved codes.
+
+    Returns:
+        Callable taking field dicts and returning the saved codes in order.
+    """
+
+    def _make_codes(*specs: dict) -> list[DiscountCode]:
+        codes = [build_code(**fields) for fields in specs]
+        db.session.add_all(codes)
+        db.session.commit()
+        return codes
+
+    return _make_codes
+
+
+@pytest.fixture
+def make_code(make_codes) -> Callable[..., DiscountCode]:
+    """Return a factory that commits a single discount code.
+
+    Args:
+        make_codes: Factory for several codes, sharing its defaults.
+
+    Returns:
+        Callable taking DiscountCode fields and returning the saved code.
+    """
+
+    def _make_code(**fields) -> DiscountCode:
+        return make_codes(fields)[0]
+
+    return _make_code
+
+
+@pytest.fixture
+def make_share(db, build_code) -> Callable[..., Share]:
+    """Return a factory that commits a share of a new discount code.
+
+    The code and the share are added together and saved in one commit; the
+    share points at the code through the relationship, so no flush is needed
+    to learn the code's id.
+
+    Args:
+        db: Database fixture.
+        build_code: Factory for unsaved codes.
+
+    Returns:
+        Callable taking the code's fields as a dict plus Share fields, and
+        returning the saved share.
+    """
+
+    def _make_share(code: dict | None = None, **fields) -> Share:
+        share = Share(discount_code=build_code(**(code or {})), **fields)
+        db.session.add(share)
+        db.session.commit()
+        return share
+
+    return _make_share
+
+
+@pytest.fixture
+def count_queries(db) -> Callable[[], AbstractContextManager[list[str]]]:
+    """Return a context manager that records the SQL statements executed inside it.
+
+    SAVEPOINT handling from the ``db`` fixture is not recorded.
+
+    Args:
+        db: Database fixture.
+
+    Returns:
+        Callable whose context yields the list of executed statements.
+    """
+
+    @contextmanager
+    def _count_queries() -> Iterator[list[str]]:
+        statements: list[str] = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+            if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO")):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+    return _count_queries
+
+
+@pytest.fixture
+def strict_loading(db) -> Callable[[], AbstractContextManager[None]]:
+    """Return a context manager that makes unplanned lazy loads raise.
+
+    ORM selects issued inside it get ``raiseload("*")``, so any relationship
+    the statement does not eager-load raises instead of querying per row.
+
+    Args:
+        db: Database fixture.
+
+    Returns:
+        Callable whose context enforces eager loading.
+    """
+
+    @contextmanager
+    def _strict_loading() -> Iterator[None]:
+        def _add_raiseload(state: ORMExecuteState) -> None:
+            lazy = state.is_column_load or state.is_relationship_load
+            if state.is_select and not lazy:
+                state.statement = state.statement.options(raiseload("*"))
+
+        event.listen(db.session, "do_orm_execute", _add_raiseload)
+        try:
+            yield
+        finally:
+            event.remove(db.session, "do_orm_execute", _add_raiseload)
+
+    return _strict_loading
@@ -2,9 +2,11 @@
 
 from datetime import datetime, timedelta, timezone
 
-from app.auth.models import User
+import pytest
+from sqlalchemy.exc import IntegrityError
+
 from app.codes.models import DiscountCode
-from app.shares.models import Share, generate_token
+from app.shares.models import Share, generate_token, hash_token
 
 
 def test_generate_token_length() -> None:
@@ -21,35 +23,32 @@ def test_generate_token_alphanumeric() -> None:
 
 def test_generate_token_unique() -> None:
     """Test token generation creates unique tokens."""
-    tokens = [generate_token() for _ in range(100)]
-    assert len(set(tokens)) == 100
+    assert len({generate_token() for _ in range(100)}) == 100
 
 
-def test_share_creation(db, test_user: User) -> None:
-    """Test Share model creation with auto-generated token and expiration."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
+@pytest.fixture
+def sample_code(make_code) -> DiscountCode:
+    """Create the discount code the shares in these tests point at."""
+    return make_code(code="TEST10", store_name="Test Store")
+
 
-    share = Share(discount_code_id=code.id)
+def test_share_creation(db, sample_code: DiscountCode) -> None:
+    """Test Share model creation with auto-generated token and expiration."""
+    share = Share(discount_code_id=sample_code.id)
     db.session.add(share)
     db.session.commit()
 
     assert share.id is not None
     assert share.token is not None
     assert len(share.token) == 8
-    assert share.discount_code_id == code.id
+    assert share.discount_code_id == sample_code.id
     assert share.expires_at is not None
     assert share.created_at is not None
 
 
-def test_share_expiration_default_one_day(db, test_user: User) -> None:
+def test_share_expiration_default_one_day(db, sample_code: DiscountCode) -> None:
     """Test Share expiration defaults to 1 day from creation."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id)
+    share = Share(discount_code_id=sample_code.id)
     db.session.add(share)
     db.session.commit()
 
@@ -58,28 +57,31 @@ def test_share_expiration_default_one_day(db, test_user: User) -> None:
     assert abs((share.expires_at - expected_expiry).total_seconds()) < 1
 
 
-def test_share_is_expired_false_when_valid(db, test_user: User) -> None:
-    """Test is_expired returns False for valid share."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
+def test_share_datetimes_load_as_utc(db, sample_code: DiscountCode) -> None:
+    """Test datetimes read back from the database are UTC-aware."""
+    share = Share(discount_code_id=sample_code.id)
+    db.session.add(share)
     db.session.commit()
+    db.session.expire_all()
+
+    assert share.expires_at.tzinfo == timezone.utc
+    assert share.created_at.tzinfo == timezone.utc
 
-    share = Share(discount_code_id=code.id)
+
+def test_share_is_expired_false_when_valid(db, sample_code: DiscountCode) -> None:
+    """Test is_expired returns False for valid share."""
+    share = Share(discount_code_id=sample_code.id)
     db.session.add(share)
     db.session.commit()
 
     assert share.is_expired is False
 
 
-def test_share_is_expired_true_when_expired(db, test_user: User) -> None:
+def test_share_is_expired_true_when_expired(db, sample_code: DiscountCode) -> None:
     """Test is_expired returns True for expired share."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
-
     # Create share with past expiration
     share = Share(
-        discount_code_id=code.id,
+        discount_code_id=sample_code.id,
         expires_at=datetime.now(timezone.utc) - timedelta(hours=1),
     )
     db.session.add(share)
@@ -88,61 +90,66 @@ def test_share_is_expired_true_when_expired(db, test_user: User) -> None:
     assert share.is_expired is True
 
 
-def test_share_relationship_to_discount_code(db, test_user: User) -> None:
-    """Test Share has relationship to DiscountCode."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
+def test_share_is_expired_filters_in_sql(db, sample_code: DiscountCode) -> None:
+    """Test is_expired can be used as a query filter."""
+    live = Share(discount_code_id=sample_code.id)
+    expired = Share(
+        discount_code_id=sample_code.id,
+        expires_at=datetime.now(timezone.utc) - timedelta(hours=1),
+    )
+    db.session.add_all([live, expired])
     db.session.commit()
 
-    share = Share(discount_code_id=code.id)
+    assert db.session.scalars(db.select(Share).where(Share.is_expired)).all() == [expired]
+    assert db.session.scalars(db.select(Share).where(~Share.is_expired)).all() == [live]
+
+
+def test_share_relationship_to_discount_code(db, sample_code: DiscountCode) -> None:
+    """Test Share has relationship to DiscountCode."""
+    share = Share(discount_code_id=sample_code.id)
     db.session.add(share)
     db.session.commit()
 
-    assert share.discount_code == code
-    assert share in code.shares
+    assert share.discount_code == sample_code
+    assert share in sample_code.shares
 
 
-def test_share_repr(db, test_user: User) -> None:
+def test_share_repr(db, sample_code: DiscountCode) -> None:
     """Test Share string representation."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, token="abc12345")
+    share = Share(discount_code_id=sample_code.id, token="abc12345")
     db.session.add(share)
     db.session.commit()
 
     assert repr(share) == "<Share abc12345>"
 
 
-def test_share_visit_count_defaults_to_zero(db, test_user: User) -> None:
-    """Test visit_count defaults to 0 on new shares."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
+def test_share_stores_token_hash(db, sample_code: DiscountCode) -> None:
+    """Test token_hash is the SHA-256 hex digest of the token."""
+    share = Share(discount_code_id=sample_code.id, token="abc12345")
+    db.session.add(share)
     db.session.commit()
 
-    share = Share(discount_code_id=code.id)
+    assert share.token_hash == hash_token("abc12345")
+    assert len(share.token_hash) == 64
+
+
+def test_share_visit_count_defaults_to_zero(db, sample_code: DiscountCode) -> None:
+    """Test visit_count defaults to 0 on new shares."""
+    share = Share(discount_code_id=sample_code.id)
     db.session.add(share)
     db.session.commit()
 
     assert share.visit_count == 0
 
 
-def test_share_token_unique_constraint(db, test_user: User) -> None:
+def test_share_token_unique_constraint(db, sample_code: DiscountCode) -> None:
     """Test Share token must be unique."""
-    code = DiscountCode(code="TEST10", store_name="Test Store", user_id=test_user.id)
-    db.session.add(code)
-    db.session.commit()
-
-    share1 = Share(discount_code_id=code.id, token="sametoken")
+    share1 = Share(discount_code_id=sample_code.id, token="sametokn")
     db.session.add(share1)
     db.session.commit()
 
-    share2 = Share(discount_code_id=code.id, token="sametoken")
+    share2 = Share(discount_code_id=sample_code.id, token="sametokn")
     db.session.add(share2)
-
-    try:
+    with pytest.raises(IntegrityError):
         db.session.commit()
-        assert False, "Should have raised an IntegrityError"
-    except Exception:
-        db.session.rollback()
+    db.session.rollback()
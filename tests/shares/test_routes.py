@@ -1,34 +1,30 @@
 """Tests for shares domain routes."""
 
 from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
 
+import pytest
 from flask.testing import FlaskClient
 
 from app.auth.models import User
-from app.codes.models import DiscountCode
 from app.shares.models import Share
 
 
 def _get_test_user(db) -> User:
     """Get the test user from the database."""
-    return User.query.filter_by(username="testuser").first()
+    return db.session.execute(db.select(User).filter_by(username="testuser")).scalar_one()
 
 
-def test_view_share_valid_token(client: FlaskClient, db, test_user: User) -> None:
+def test_view_share_valid_token(client: FlaskClient, db, make_share) -> None:
     """Test viewing a share with valid token shows discount code."""
-    code = DiscountCode(
-        code="SHARE10",
-        store_name="Share Store",
-        discount_value="10%",
-        notes="Test notes",
-        user_id=test_user.id,
+    share = make_share(
+        {
+            "code": "SHARE10",
+            "store_name": "Share Store",
+            "discount_value": "10%",
+            "notes": "Test notes",
+        },
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = client.get(f"/shares/{share.token}")
     assert response.status_code == 200
@@ -39,39 +35,22 @@ def test_view_share_valid_token(client: FlaskClient, db, test_user: User) -> Non
 
 
 def test_view_share_does_not_show_creator(
-    client: FlaskClient, db, test_user: User
+    client: FlaskClient, db, test_user: User, make_share
 ) -> None:
     """Test viewing a share does not show the creator's username."""
-    code = DiscountCode(
-        code="CREATOR10",
-        store_name="Creator Store",
-        user_id=test_user.id,
+    share = make_share(
+        {"code": "CREATOR10", "store_name": "Creator Store"},
+        created_by=test_user.id,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=test_user.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = client.get(f"/shares/{share.token}")
     assert response.status_code == 200
     assert b"Shared by" not in response.data
 
 
-def test_view_share_no_auth_required(client: FlaskClient, db, test_user: User) -> None:
+def test_view_share_no_auth_required(client: FlaskClient, db, make_share) -> None:
     """Test viewing a share does not require authentication."""
-    code = DiscountCode(
-        code="PUBLIC10",
-        store_name="Public Store",
-        user_id=test_user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id)
-    db.session.add(share)
-    db.session.commit()
+    share = make_share({"code": "PUBLIC10", "store_name": "Public Store"})
 
     # Using unauthenticated client
     response = client.get(f"/shares/{share.token}")
@@ -79,24 +58,12 @@ def test_view_share_no_auth_required(client: FlaskClient, db, test_user: User) -
     assert b"Public Store" in response.data
 
 
-def test_view_share_expired_shows_message(
-    client: FlaskClient, db, test_user: User
-) -> None:
+def test_view_share_expired_shows_message(client: FlaskClient, db, make_share) -> None:
     """Test viewing an expired share shows expired message."""
-    code = DiscountCode(
-        code="EXPIRED10",
-        store_name="Expired Store",
-        user_id=test_user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(
-        discount_code_id=code.id,
+    share = make_share(
+        {"code": "EXPIRED10", "store_name": "Expired Store"},
         expires_at=datetime.now(timezone.utc) - timedelta(hours=1),
     )
-    db.session.add(share)
-    db.session.commit()
 
     response = client.get(f"/shares/{share.token}")
     assert response.status_code == 200
@@ -104,77 +71,87 @@ def test_view_share_expired_shows_message(
     assert b"This share link has expired" in response.data
 
 
-def test_view_share_increments_visit_count(
-    client: FlaskClient, db, test_user: User
-) -> None:
+def test_view_share_increments_visit_count(client: FlaskClient, db, make_share) -> None:
     """Test viewing a valid share increments visit_count."""
-    code = DiscountCode(
-        code="VISIT10",
-        store_name="Visit Store",
-        user_id=test_user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id)
-    db.session.add(share)
-    db.session.commit()
+    share = make_share({"code": "VISIT10", "store_name": "Visit Store"})
 
     assert share.visit_count == 0
 
     client.get(f"/shares/{share.token}")
-    db.session.refresh(share)
+    db.session.expire(share, ["visit_count"])
     assert share.visit_count == 1
 
     client.get(f"/shares/{share.token}")
-    db.session.refresh(share)
+    db.session.expire(share, ["visit_count"])
     assert share.visit_count == 2
 
 
 def test_view_share_expired_does_not_increment_visit_count(
-    client: FlaskClient, db, test_user: User
+    client: FlaskClient, db, make_share
 ) -> None:
     """Test viewing an expired share does not increment visit_count."""
-    code = DiscountCode(
-        code="EXPVISIT10",
-        store_name="Expired Visit Store",
-        user_id=test_user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(
-        discount_code_id=code.id,
+    share = make_share(
+        {"code": "EXPVISIT10", "store_name": "Expired Visit Store"},
         expires_at=datetime.now(timezone.utc) - timedelta(hours=1),
     )
-    db.session.add(share)
-    db.session.commit()
 
     client.get(f"/shares/{share.token}")
-    db.session.refresh(share)
+    db.session.expire(share, ["visit_count"])
     assert share.visit_count == 0
 
 
+def test_view_share_sets_cache_headers(client: FlaskClient, db, make_share) -> None:
+    """Test share view is publicly cacheable for a short time and has an ETag."""
+    share = make_share({"code": "CACHE10", "store_name": "Cache Store"})
+
+    response = client.get(f"/shares/{share.token}")
+    assert response.headers["ETag"]
+    assert response.cache_control.public
+    assert response.cache_control.max_age == 60
+
+
+def test_view_share_not_modified_skips_visit_count(
+    client: FlaskClient, db, make_share
+) -> None:
+    """Test a matching If-None-Match returns 304 without counting a visit."""
+    share = make_share({"code": "ETAG10", "store_name": "ETag Store"})
+
+    etag = client.get(f"/shares/{share.token}").headers["ETag"]
+    response = client.get(f"/shares/{share.token}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    db.session.expire(share, ["visit_count"])
+    assert share.visit_count == 1
+
+    # Editing the code changes the ETag, so the page is served again
+    share.discount_code.notes = "Updated"
+    db.session.commit()
+    response = client.get(f"/shares/{share.token}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
 def test_view_share_invalid_token_404(client: FlaskClient, db) -> None:
     """Test viewing a share with invalid token returns 404."""
     response = client.get("/shares/invalidtoken")
     assert response.status_code == 404
 
 
-def test_view_share_shows_store_url(client: FlaskClient, db, test_user: User) -> None:
+def test_view_share_malformed_token_skips_query(client: FlaskClient, db) -> None:
+    """Test a token of the wrong shape is rejected without querying the database."""
+    with patch.object(db.session, "execute") as execute:
+        for token in ("short", "abc-1234", "abcdé123"):
+            assert client.get(f"/shares/{token}").status_code == 404
+    execute.assert_not_called()
+
+
+def test_view_share_shows_store_url(client: FlaskClient, db, make_share) -> None:
     """Test share view shows store URL when present."""
-    code = DiscountCode(
-        code="URL10",
-        store_name="URL Store",
-        store_url="https://example.com",
-        user_id=test_user.id,
+    share = make_share(
+        {
+            "code": "URL10",
+            "store_name": "URL Store",
+            "store_url": "https://example.com",
+        },
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = client.get(f"/shares/{share.token}")
     assert response.status_code == 200
@@ -182,31 +159,20 @@ def test_view_share_shows_store_url(client: FlaskClient, db, test_user: User) ->
     assert b"Visit Store" in response.data
 
 
-def test_create_share_requires_login(client: FlaskClient, db, test_user: User) -> None:
+def test_create_share_requires_login(client: FlaskClient, db, make_code) -> None:
     """Test creating a share redirects to login when not authenticated."""
-    code = DiscountCode(
-        code="TEST10",
-        store_name="Test Store",
-        user_id=test_user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="TEST10", store_name="Test Store")
 
     response = client.post(f"/shares/create/{code.id}")
     assert response.status_code == 302
     assert "/auth/login" in response.headers["Location"]
 
 
-def test_create_share_creates_share(authenticated_client: FlaskClient, db) -> None:
-    """Test creating a share creates a new share record."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="CREATE10",
-        store_name="Create Store",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+def test_create_share_creates_share(
+    authenticated_client: FlaskClient, db, make_code
+) -> None:
+    """Test creating a share saves it and redirects to its share view."""
+    code = make_code(code="CREATE10", store_name="Create Store")
 
     response = authenticated_client.post(
         f"/shares/create/{code.id}",
@@ -214,31 +180,11 @@ def test_create_share_creates_share(authenticated_client: FlaskClient, db) -> No
     )
     assert response.status_code == 302
 
-    share = Share.query.filter_by(discount_code_id=code.id).first()
+    share = db.session.execute(
+        db.select(Share).filter_by(discount_code_id=code.id)
+    ).scalar_one_or_none()
     assert share is not None
-    assert f"/shares/{share.token}" in response.headers["Location"]
-
-
-def test_create_share_redirects_to_share_view(
-    authenticated_client: FlaskClient, db
-) -> None:
-    """Test creating a share redirects to the share view page."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="REDIRECT10",
-        store_name="Redirect Store",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
-
-    response = authenticated_client.post(
-        f"/shares/create/{code.id}",
-        follow_redirects=True,
-    )
-    assert response.status_code == 200
-    assert b"Redirect Store" in response.data
-    assert b"REDIRECT10" in response.data
+    assert response.headers["Location"] == f"/shares/{share.token}"
 
 
 def test_create_share_404_for_nonexistent_code(
@@ -249,94 +195,65 @@ def test_create_share_404_for_nonexistent_code(
     assert response.status_code == 404
 
 
-def test_homepage_shows_share_icon(authenticated_client: FlaskClient, db) -> None:
+def test_homepage_shows_share_icon(
+    authenticated_client: FlaskClient, db, make_code
+) -> None:
     """Test homepage displays share icon for shareable codes."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="ICON10",
-        store_name="Icon Store",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="ICON10", store_name="Icon Store")
 
     response = authenticated_client.get("/")
     assert f"/shares/create/{code.id}".encode() in response.data
 
 
 def test_create_share_400_for_used_code(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_code
 ) -> None:
     """Test creating a share for used code returns 400."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="USED10",
-        store_name="Used Store",
-        is_used=True,
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="USED10", store_name="Used Store", is_used=True)
 
     response = authenticated_client.post(f"/shares/create/{code.id}")
     assert response.status_code == 400
 
 
 def test_create_share_400_for_expired_code(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_code, today: date
 ) -> None:
     """Test creating a share for expired code returns 400."""
-    user = _get_test_user(db)
-    code = DiscountCode(
+    code = make_code(
         code="EXPIRED10",
         store_name="Expired Store",
-        expiry_date=date.today() - timedelta(days=1),
-        user_id=user.id,
+        expiry_date=today - timedelta(days=1),
     )
-    db.session.add(code)
-    db.session.commit()
 
     response = authenticated_client.post(f"/shares/create/{code.id}")
     assert response.status_code == 400
 
 
 def test_homepage_hides_share_icon_for_used_code(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_code
 ) -> None:
     """Test homepage hides share icon for used codes."""
-    user = _get_test_user(db)
-    code = DiscountCode(
-        code="USED10",
-        store_name="Used Store",
-        is_used=True,
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="USED10", store_name="Used Store", is_used=True)
 
     response = authenticated_client.get("/")
     assert f"/shares/create/{code.id}".encode() not in response.data
 
 
 def test_homepage_hides_share_icon_for_expired_code(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_code, today: date
 ) -> None:
     """Test homepage hides share icon for expired codes."""
-    user = _get_test_user(db)
-    code = DiscountCode(
+    code = make_code(
         code="EXPIRED10",
         store_name="Expired Store",
-        expiry_date=date.today() - timedelta(days=1),
-        user_id=user.id,
+        expiry_date=today - timedelta(days=1),
     )
-    db.session.add(code)
-    db.session.commit()
 
     response = authenticated_client.get("/")
     assert f"/shares/create/{code.id}".encode() not in response.data
 
 
-def test_list_shares_requires_login(client: FlaskClient, db, test_user: User) -> None:
+def test_list_shares_requires_login(client: FlaskClient, db) -> None:
     """Test listing shares redirects to login when not authenticated."""
     response = client.get("/shares/")
     assert response.status_code == 302
@@ -344,22 +261,18 @@ def test_list_shares_requires_login(client: FlaskClient, db, test_user: User) ->
 
 
 def test_list_shares_shows_user_shares(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_share
 ) -> None:
     """Test listing shares shows shares created by the current user."""
     user = _get_test_user(db)
-    code = DiscountCode(
-        code="LIST10",
-        store_name="List Store",
-        discount_value="10%",
-        user_id=user.id,
+    share = make_share(
+        {
+            "code": "LIST10",
+            "store_name": "List Store",
+            "discount_value": "10%",
+        },
+        created_by=user.id,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=user.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = authenticated_client.get("/shares/")
     assert response.status_code == 200
@@ -370,21 +283,14 @@ def test_list_shares_shows_user_shares(
 
 
 def test_list_shares_shows_creator_username(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_share
 ) -> None:
     """Test listing shares shows the creator's username."""
     user = _get_test_user(db)
-    code = DiscountCode(
-        code="LISTCREATOR10",
-        store_name="List Creator Store",
-        user_id=user.id,
+    make_share(
+        {"code": "LISTCREATOR10", "store_name": "List Creator Store"},
+        created_by=user.id,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=user.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = authenticated_client.get("/shares/")
     assert response.status_code == 200
@@ -393,25 +299,15 @@ def test_list_shares_shows_creator_username(
 
 
 def test_list_shares_hides_other_users_shares(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_user, make_share
 ) -> None:
     """Test listing shares does not show shares created by other users."""
-    other_user = User(username="otheruser")
-    other_user.set_password("otherpassword")
-    db.session.add(other_user)
-    db.session.commit()
+    other_user = make_user("otheruser", "otherpassword")
 
-    code = DiscountCode(
-        code="OTHER10",
-        store_name="Other Store",
-        user_id=other_user.id,
+    make_share(
+        {"code": "OTHER10", "store_name": "Other Store", "user": other_user},
+        creator=other_user,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=other_user.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = authenticated_client.get("/shares/")
     assert response.status_code == 200
@@ -426,66 +322,42 @@ def test_list_shares_empty_state(authenticated_client: FlaskClient, db) -> None:
 
 
 def test_list_shares_shows_active_status(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_share
 ) -> None:
     """Test listing shares shows Active badge for non-expired shares."""
     user = _get_test_user(db)
-    code = DiscountCode(
-        code="ACTIVE10",
-        store_name="Active Store",
-        user_id=user.id,
+    make_share(
+        {"code": "ACTIVE10", "store_name": "Active Store"},
+        created_by=user.id,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=user.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = authenticated_client.get("/shares/")
     assert b"Active" in response.data
 
 
 def test_list_shares_shows_expired_status(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_share
 ) -> None:
     """Test listing shares shows Expired badge for expired shares."""
     user = _get_test_user(db)
-    code = DiscountCode(
-        code="EXP10",
-        store_name="Exp Store",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(
-        discount_code_id=code.id,
+    make_share(
+        {"code": "EXP10", "store_name": "Exp Store"},
         created_by=user.id,
         expires_at=datetime.now(timezone.utc) - timedelta(hours=1),
     )
-    db.session.add(share)
-    db.session.commit()
 
     response = authenticated_client.get("/shares/")
     assert b"Expired" in response.data
 
 
 def test_delete_share_requires_login(
-    client: FlaskClient, db, test_user: User
+    client: FlaskClient, db, test_user: User, make_share
 ) -> None:
     """Test deleting a share redirects to login when not authenticated."""
-    code = DiscountCode(
-        code="DEL10",
-        store_name="Del Store",
-        user_id=test_user.id,
+    share = make_share(
+        {"code": "DEL10", "store_name": "Del Store"},
+        created_by=test_user.id,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=test_user.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = client.post(f"/shares/{share.id}/delete")
     assert response.status_code == 302
@@ -493,21 +365,14 @@ def test_delete_share_requires_login(
 
 
 def test_delete_share_removes_share(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_share
 ) -> None:
     """Test deleting a share removes it from the database."""
     user = _get_test_user(db)
-    code = DiscountCode(
-        code="DELOK10",
-        store_name="DelOk Store",
-        user_id=user.id,
+    share = make_share(
+        {"code": "DELOK10", "store_name": "DelOk Store"},
+        created_by=user.id,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=user.id)
-    db.session.add(share)
-    db.session.commit()
     share_id = share.id
     token = share.token
 
@@ -525,25 +390,15 @@ def test_delete_share_removes_share(
 
 
 def test_delete_share_forbidden_for_other_user(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_user, make_share
 ) -> None:
     """Test deleting a share owned by another user returns 403."""
-    other_user = User(username="otheruser2")
-    other_user.set_password("otherpassword")
-    db.session.add(other_user)
-    db.session.commit()
+    other_user = make_user("otheruser2", "otherpassword")
 
-    code = DiscountCode(
-        code="FORBID10",
-        store_name="Forbid Store",
-        user_id=other_user.id,
+    share = make_share(
+        {"code": "FORBID10", "store_name": "Forbid Store", "user": other_user},
+        creator=other_user,
     )
-    db.session.add(code)
-    db.session.commit()
-
-    share = Share(discount_code_id=code.id, created_by=other_user.id)
-    db.session.add(share)
-    db.session.commit()
 
     response = authenticated_client.post(f"/shares/{share.id}/delete")
     assert response.status_code == 403
@@ -558,23 +413,87 @@ def test_delete_share_404_for_nonexistent(
 
 
 def test_create_share_sets_created_by(
-    authenticated_client: FlaskClient, db
+    authenticated_client: FlaskClient, db, make_code
 ) -> None:
     """Test creating a share sets created_by to the current user."""
     user = _get_test_user(db)
-    code = DiscountCode(
-        code="CREATOR10",
-        store_name="Creator Store",
-        user_id=user.id,
-    )
-    db.session.add(code)
-    db.session.commit()
+    code = make_code(code="CREATOR10", store_name="Creator Store")
 
     authenticated_client.post(
         f"/shares/create/{code.id}",
         follow_redirects=False,
     )
 
-    share = Share.query.filter_by(discount_code_id=code.id).first()
+    share = db.session.execute(
+        db.select(Share).filter_by(discount_code_id=code.id)
+    ).scalar_one_or_none()
     assert share is not None
     assert share.created_by == user.id
+
+
+def test_create_share_reuses_live_share(
+    authenticated_client: FlaskClient, db, make_code
+) -> None:
+    """Test creating a share twice redirects to the same live share."""
+    code = make_code(code="TWICE10", store_name="Twice Store")
+
+    first = authenticated_client.post(f"/shares/create/{code.id}")
+    second = authenticated_client.post(f"/shares/create/{code.id}")
+
+    assert first.headers["Location"] == second.headers["Location"]
+    share_count = db.session.scalar(
+        db.select(db.func.count())
+        .select_from(Share)
+        .where(Share.discount_code_id == code.id)
+    )
+    assert share_count == 1
+
+
+def test_create_share_ignores_expired_share(
+    authenticated_client: FlaskClient, db, make_share
+) -> None:
+    """Test an expired share is not reused when creating a new one."""
+    user = _get_test_user(db)
+    expired = make_share(
+        {"code": "RENEW10", "store_name": "Renew Store"},
+        created_by=user.id,
+        expires_at=datetime.now(timezone.utc) - timedelta(hours=1),
+    )
+    code = expired.discount_code
+
+    response = authenticated_client.post(f"/shares/create/{code.id}")
+
+    assert f"/shares/{expired.token}" not in response.headers["Location"]
+    share_count = db.session.scalar(
+        db.select(db.func.count())
+        .select_from(Share)
+        .where(Share.discount_code_id == code.id)
+    )
+    assert share_count == 2
+
+
+def test_view_share_rate_limited(app, client: FlaskClient, db) -> None:
+    """Test a client over the share page budget gets 429 before any lookup."""
+    limit = int(app.config["SHARE_VIEW_RATE_LIMIT"].split()[0])
+    for _ in range(limit):
+        assert client.get("/shares/abcd1234").status_code == 404
+
+    with patch.object(db.session, "execute") as execute:
+        assert client.get("/shares/abcd1234").status_code == 429
+    execute.assert_not_called()
+
+
+# Direct to gunicorn, or behind nginx connecting from the test client's 127.0.0.1
+@pytest.mark.parametrize("ip_key", ["REMOTE_ADDR", "HTTP_X_FORWARDED_FOR"])
+def test_view_share_rate_limit_is_per_client_ip(
+    app, client: FlaskClient, db, ip_key: str
+) -> None:
+    """Test one client exhausting the share page budget doesn't block another."""
+    limit = int(app.config["SHARE_VIEW_RATE_LIMIT"].split()[0])
+    for _ in range(limit):
+        client.get("/shares/abcd1234", environ_base={ip_key: "198.51.100.1"})
+    response = client.get("/shares/abcd1234", environ_base={ip_key: "198.51.100.1"})
+    assert response.status_code == 429
+
+    response = client.get("/shares/abcd1234", environ_base={ip_key: "198.51.100.2"})
+    assert response.status_code == 404
@@ -0,0 +1,85 @@
+"""Tests for the share visit write-behind buffer."""
+
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy.exc import OperationalError
+
+from app.shares.visits import VisitBuffer
+
+
+def _failing_write(batch) -> None:
+    """Stand in for VisitBuffer._write when the database rejects the UPDATE."""
+    raise OperationalError("UPDATE shares", {}, Exception("database is locked"))
+
+
+def test_visit_buffer_writes_in_batches(db, make_share) -> None:
+    """Test visits are only written once flush_every is reached."""
+    share = make_share()
+    buffer = VisitBuffer(flush_every=3, max_age=3600)
+
+    buffer.record(share.id)
+    buffer.record(share.id)
+    db.session.expire(share, ["visit_count"])
+    assert share.visit_count == 0
+
+    buffer.record(share.id)
+    db.session.expire(share, ["visit_count"])
+    assert share.visit_count == 3
+
+
+def test_visit_buffer_flush_writes_pending(db, make_share) -> None:
+    """Test flush writes buffered visits immediately."""
+    share = make_share()
+    buffer = VisitBuffer(flush_every=100, max_age=3600)
+
+    buffer.record(share.id)
+    buffer.record(share.id)
+    buffer.flush()
+    db.session.expire(share, ["visit_count"])
+    assert share.visit_count == 2
+
+
+def test_visit_buffer_flushes_when_stale(db, make_share) -> None:
+    """Test a visit after max_age has passed triggers a flush."""
+    share = make_share()
+    buffer = VisitBuffer(flush_every=100, max_age=0)
+
+    buffer.record(share.id)
+    db.session.expire(share, ["visit_count"])
+    assert share.visit_count == 1
+
+
+def test_visit_buffer_keeps_counts_when_write_fails(db, make_share, monkeypatch) -> None:
+    """Test a failed write keeps its visits for the next flush."""
+    share = make_share()
+    buffer = VisitBuffer(flush_every=100, max_age=3600)
+    buffer.record(share.id)
+    buffer.record(share.id)
+
+    with monkeypatch.context() as m:
+        m.setattr(VisitBuffer, "_write", staticmethod(_failing_write))
+        buffer.flush()
+
+    buffer.record(share.id)
+    buffer.flush()
+    db.session.expire(share, ["visit_count"])
+    assert share.visit_count == 3
+
+
+def test_list_shares_survives_failed_visit_write(
+    app: Flask, authenticated_client: FlaskClient, db, make_share, monkeypatch, caplog
+) -> None:
+    """Test the share list still renders when buffered visits can't be written."""
+    share = make_share()
+    buffer = app.extensions["share_visits"]
+    monkeypatch.setattr(buffer, "flush_every", 100)
+    buffer.record(share.id)
+
+    monkeypatch.setattr(VisitBuffer, "_write", staticmethod(_failing_write))
+    response = authenticated_client.get("/shares/")
+
+    assert response.status_code == 200
+    assert "Failed to write 1 buffered share visits" in caplog.text
+    monkeypatch.undo()
+    # Leave nothing pending for later tests sharing the app's buffer
+    buffer.flush()
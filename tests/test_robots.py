@@ -1,24 +1,48 @@
 """Tests for SEO blocking (robots.txt, X-Robots-Tag)."""
 
+from collections.abc import Iterator
+
+import pytest
+from flask import Flask
 from flask.testing import FlaskClient
+from werkzeug.test import TestResponse
+
+
+@pytest.fixture(scope="module")
+def robots_response(app: Flask) -> Iterator[TestResponse]:
+    """Fetch /robots.txt once for every test in the module.
+
+    Args:
+        app: Flask application fixture.
 
+    Yields:
+        Response with its body already read.
+    """
+    response = app.test_client().get("/robots.txt")
+    response.get_data()
+    yield response
+    response.close()
 
-def test_robots_txt_disallows_all(client: FlaskClient) -> None:
+
+def test_robots_txt_disallows_all(robots_response: TestResponse) -> None:
     """Test that robots.txt blocks all bots from all paths."""
-    response = client.get("/robots.txt")
-    assert response.status_code == 200
-    text = response.get_data(as_text=True)
+    assert robots_response.status_code == 200
+    text = robots_response.get_data(as_text=True)
     assert "User-agent: *" in text
     assert "Disallow: /" in text
 
 
-def test_robots_txt_content_type(client: FlaskClient) -> None:
+def test_robots_txt_content_type(robots_response: TestResponse) -> None:
     """Test that robots.txt returns plain text."""
-    response = client.get("/robots.txt")
-    assert response.content_type == "text/plain; charset=utf-8"
+    assert robots_response.content_type == "text/plain; charset=utf-8"
 
 
 def test_x_robots_tag_header_present(client: FlaskClient) -> None:
     """Test that X-Robots-Tag header is set on responses."""
     response = client.get("/auth/login")
     assert response.headers.get("X-Robots-Tag") == "noindex, nofollow"
+
+
+def test_x_robots_tag_header_on_static_files(robots_response: TestResponse) -> None:
+    """Test that X-Robots-Tag header is also set on static file responses."""
+    assert robots_response.headers.getlist("X-Robots-Tag") == ["noindex, nofollow"]